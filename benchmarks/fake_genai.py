@@ -0,0 +1,105 @@
+"""
+Offline stand-in for google.genai.Client used by the benchmarks. Answers
+the outline, script and evaluator requests with canned, deterministic
+responses sized to the deck being benchmarked.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+
+def fake_outline(topic, slides):
+    lines = [f"# {topic}", ""]
+    for k in range(slides):
+        lines += [f"## Part {k + 1}", f"- Key idea {k + 1} about {topic}", f"- Worked example {k + 1}", ""]
+    return "\n".join(lines)
+
+
+def fake_script(topic, slides):
+    """A lint-clean script: short sentences, no symbols, one narration line per page."""
+    deck = []
+    for k in range(slides):
+        bullets = [f"Point {j + 1} of part {k + 1}" for j in range(k % 3 + 1)]
+        deck.append({
+            "title": f"Part {k + 1} of {topic}",
+            "content": bullets,
+            "narration": [f"Now we look at part {k + 1} of {topic}."]
+                         + [f"Here is point {j + 1}. It builds on what we saw before." for j in range(len(bullets))],
+            "image_prompt": f"A simple sketch showing part {k + 1} of {topic} on a whiteboard",
+            "video_prompt": "",
+            "is_video_slide": False,
+        })
+    return {
+        "presentation_title": topic,
+        "module": "Benchmark",
+        "episode": "Episode 1",
+        "learning_objectives": [f"Explain {topic}"],
+        "duration": "3-4 min",
+        "outline": [slide["title"] for slide in deck],
+        "meta_tags": ["benchmark"],
+        "prerequisites": "None",
+        "slides": deck,
+    }
+
+
+def _response(text, prompt=""):
+    usage = SimpleNamespace(
+        prompt_token_count=len(str(prompt)) // 4,
+        candidates_token_count=len(text) // 4,
+        total_token_count=(len(str(prompt)) + len(text)) // 4,
+    )
+    return SimpleNamespace(text=text, parts=[], usage_metadata=usage)
+
+
+class FakeModels:
+    """
+    `latency` seconds are slept per request, and streamed responses arrive
+    in `chunk_chars` pieces, to approximate a real model when wanted.
+    """
+
+    def __init__(self, topic, slides, latency=0.0, chunk_chars=256):
+        self.topic = topic
+        self.slides = slides
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+
+    def _reply(self, config):
+        schema = getattr(config, "response_schema", None) if config else None
+        if hasattr(schema, "model_dump"):
+            schema = schema.model_dump(exclude_none=True)
+        described = json.dumps(schema, default=str) if schema else ""
+        if '"slides"' in described:
+            return json.dumps(fake_script(self.topic, self.slides))
+        if '"passed"' in described:
+            return json.dumps({"passed": True, "feedback": "Meets the standards.", "issues": []})
+        return fake_outline(self.topic, self.slides)
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        return _response(self._reply(config), contents)
+
+    def generate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        text = self._reply(config)
+        for start in range(0, len(text), self.chunk_chars):
+            yield _response(text[start:start + self.chunk_chars], contents)
+
+
+class FakeAsyncModels:
+    def __init__(self, models):
+        self._models = models
+
+    async def generate_content(self, model, contents, config=None):
+        self._models.calls += 1
+        await asyncio.sleep(self._models.latency)
+        return _response(self._models._reply(config), contents)
+
+
+class FakeClient:
+    def __init__(self, topic, slides, latency=0.0):
+        self.models = FakeModels(topic, slides, latency=latency)
+        self.aio = SimpleNamespace(models=FakeAsyncModels(self.models))
@@ -0,0 +1,260 @@
+"""
+Benchmark: the whole LangGraph pipeline, end to end, without network access.
+
+Gemini text calls are answered by a fake client (or replayed from an LLM
+cache recorded earlier with LLM_CACHE_MODE=record), narration uses the stub
+TTS backend and images the stub image backend. Everything else (LaTeX,
+rasterisation, ffmpeg) runs for real against empty caches.
+
+Each (mode, deck size) case runs in its own child process so peak RSS is
+measured independently. Per-node wall and CPU time come from the graph's
+task events; CPU time includes child processes such as pdflatex and ffmpeg,
+and is approximate for nodes that run in parallel.
+
+Usage:
+    python -m benchmarks.graph_bench [--modes script_only,video_production] [--slides 5,14,50]
+                                     [--repeat 1] [--replay llm.sqlite] [--out report.json]
+                                     [--baseline old_report.json] [--timeout 1800]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ["outline_only", "script_only", "slides_only", "video_production"]
+TOPIC = "Prompt engineering basics"
+
+
+def _cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _size(path):
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def _tree_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names)
+
+
+def initial_state(mode, slides, workspace):
+    """The state each server handler would build for `mode`, with inputs faked for `slides` slides."""
+    from benchmarks.fake_genai import fake_outline, fake_script
+    from benchmarks.rasterise_bench import make_sample_pdf
+
+    state = {"mode": mode, "job_id": os.path.basename(workspace), "workspace_dir": workspace}
+    if mode == "outline_only":
+        state["topic"] = TOPIC
+    elif mode in ("script_only", "full_production"):
+        state.update({
+            "project_id": 1,
+            "outline": fake_outline(TOPIC, slides),
+            "evaluation_iteration": 0,
+            "evaluation_passed": False,
+            "evaluation_feedback": None,
+        })
+    else:
+        state["json_script"] = fake_script(TOPIC, slides)
+        if mode == "video_production":
+            # A deck with the right page count, so video timing does not depend on LaTeX
+            pages = sum(len(slide["content"]) + 1 for slide in state["json_script"]["slides"])
+            state["pdf_path"] = os.path.join(workspace, "deck.pdf")
+            make_sample_pdf(state["pdf_path"], pages)
+    return state
+
+
+async def _run_graph(graph, state, nodes):
+    """Streams the graph, accumulating per-node timings into `nodes`. Returns the final state."""
+    started = {}
+    final_state = state
+    async for stream_mode, chunk in graph.astream(state, stream_mode=["tasks", "values"]):
+        if stream_mode == "values":
+            final_state = chunk
+        elif "input" in chunk:
+            started[chunk["id"]] = (time.perf_counter(), _cpu_seconds())
+        elif chunk["id"] in started:
+            wall, cpu = started.pop(chunk["id"])
+            node = nodes.setdefault(chunk["name"], {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            node["calls"] += 1
+            node["wall_seconds"] += time.perf_counter() - wall
+            node["cpu_seconds"] += _cpu_seconds() - cpu
+    return final_state
+
+
+def _run_case(mode, slides, settings, queue):
+    """Child process: configures an isolated environment, runs one case and reports its metrics."""
+    tmp = tempfile.mkdtemp(prefix="graph_bench_")
+    os.environ.update({
+        "ASSET_CACHE_DIR": os.path.join(tmp, "cache"),
+        "WORKSPACE_ROOT": os.path.join(tmp, "workspaces"),
+        "LLM_CACHE_MODE": "replay" if settings["replay"] else "off",
+        "LLM_CACHE_PATH": settings["replay"] or os.path.join(tmp, "llm.sqlite"),
+        "TTS_BACKEND": "stub",
+        "IMAGE_BACKEND": "stub",
+        "VIDEO_RENDER_MODE": settings["render_mode"],
+    })
+    os.chdir(ROOT)
+    # Node logs go to stderr so stdout carries only the JSON report
+    sys.stdout = sys.stderr
+
+    # Imported only now, so module-level settings pick up the environment above
+    from agent import build_graph
+    from benchmarks.fake_genai import FakeClient
+    from utils.genai_client import set_client
+    from utils.workspace import create_workspace
+
+    client = FakeClient(TOPIC, slides, latency=settings["latency"])
+    set_client(client)
+    _, workspace = create_workspace(f"bench_{mode}_{slides}")
+    state = initial_state(mode, slides, workspace)
+
+    nodes, error = {}, None
+    started, cpu = time.perf_counter(), _cpu_seconds()
+    try:
+        final_state = asyncio.run(_run_graph(build_graph(), state, nodes))
+    except Exception as e:
+        final_state, error = state, f"{type(e).__name__}: {e}"
+    seconds, cpu = time.perf_counter() - started, _cpu_seconds() - cpu
+
+    json_script = final_state.get("json_script") or {}
+    artifacts = {
+        "script_pdf_bytes": _size(final_state.get("script_pdf_path")),
+        "slides_pdf_bytes": _size(final_state.get("pdf_path")) if mode != "video_production" else 0,
+        "video_bytes": _size(final_state.get("video_path")),
+        "audio_bytes": sum(_size(path) for path in (final_state.get("audio_map") or {}).values()),
+        "image_bytes": sum(_size(slide.get("image_path")) for slide in json_script.get("slides", [])),
+        "workspace_bytes": _tree_size(workspace),
+    }
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    queue.put({
+        "seconds": seconds,
+        "cpu_seconds": cpu,
+        "peak_rss_kb": own,
+        "peak_child_rss_kb": children,
+        "llm_calls": client.models.calls,
+        "nodes": nodes,
+        "artifacts": artifacts,
+        "error": error,
+    })
+
+
+def measure(mode, slides, settings):
+    """Runs one case in a child process. A child that dies or overruns is reported as the case's error."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(mode, slides, settings, queue))
+    proc.start()
+    deadline = time.monotonic() + settings["timeout"]
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1.0)
+        except queue_module.Empty:
+            # A child that crashed (import error, OOM kill, native fault) never reports
+            if not proc.is_alive() or time.monotonic() > deadline:
+                break
+    if result is None:
+        reason = "timed out" if proc.is_alive() else f"exited with code {proc.exitcode}"
+        proc.kill()
+        result = {"seconds": 0.0, "cpu_seconds": 0.0, "peak_rss_kb": 0, "peak_child_rss_kb": 0,
+                  "llm_calls": 0, "nodes": {}, "artifacts": {}, "error": f"Benchmark process {reason}"}
+    proc.join()
+    return result
+
+
+def _round_nodes(nodes):
+    return {name: {"calls": node["calls"],
+                   "wall_seconds": round(node["wall_seconds"], 3),
+                   "cpu_seconds": round(node["cpu_seconds"], 3)}
+            for name, node in nodes.items()}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated graph modes")
+    parser.add_argument("--slides", default="5,14,50", help="Comma-separated deck sizes")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported")
+    parser.add_argument("--replay", help="LLM cache recorded with LLM_CACHE_MODE=record to replay instead of the fake client")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake client waits per request")
+    parser.add_argument("--render-mode", default="single", choices=["single", "segments"])
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds before a case's process is killed")
+    parser.add_argument("--out", help="Write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare each case's seconds against")
+    args = parser.parse_args()
+
+    settings = {"replay": os.path.abspath(args.replay) if args.replay else None,
+                "latency": args.latency, "render_mode": args.render_mode, "timeout": args.timeout}
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": settings,
+        "cases": [],
+    }
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {(case["mode"], case["slides"]): case for case in json.load(f)["cases"]}
+
+    for mode in args.modes.split(","):
+        # The outline does not depend on the deck size, so it runs once
+        sizes = [None] if mode == "outline_only" else [int(n) for n in args.slides.split(",")]
+        for slides in sizes:
+            runs = [measure(mode, slides or 5, settings) for _ in range(args.repeat)]
+            # Failed runs only count when every run failed
+            best = min([r for r in runs if not r["error"]] or runs, key=lambda r: r["seconds"])
+            case = {
+                "mode": mode,
+                "slides": slides,
+                "seconds": round(best["seconds"], 3),
+                "cpu_seconds": round(best["cpu_seconds"], 3),
+                "peak_rss_mb": round(max(r["peak_rss_kb"] for r in runs) / 1024, 1),
+                "peak_child_rss_mb": round(max(r["peak_child_rss_kb"] for r in runs) / 1024, 1),
+                "llm_calls": best["llm_calls"],
+                "nodes": _round_nodes(best["nodes"]),
+                "artifacts": best["artifacts"],
+                "error": best["error"],
+            }
+            previous = baseline.get((mode, slides))
+            if previous and previous.get("seconds"):
+                case["baseline_seconds"] = previous["seconds"]
+                case["speedup"] = round(previous["seconds"] / case["seconds"], 2) if case["seconds"] else None
+            report["cases"].append(case)
+            status = f" ({case['error']})" if case["error"] else ""
+            print(f"{mode:>17} {str(slides or '-'):>4} slides: {case['seconds']:.2f}s{status}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
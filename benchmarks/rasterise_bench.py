@@ -0,0 +1,101 @@
+"""
+Benchmark: legacy 300 DPI serial rasterisation vs. parallel rasterisation at
+the output video resolution.
+
+Each variant runs in its own child process so peak RSS is measured
+independently (ru_maxrss of the largest process, including pool workers).
+
+Usage:
+    python -m benchmarks.rasterise_bench [--pdf output.pdf] [--pages 60] [--repeat 3]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+from utils.rasterise import rasterise_pages
+
+
+def make_sample_pdf(path, pages):
+    """Builds a beamer-sized (4:3) deck with some text and vector shapes per page."""
+    doc = fitz.open()
+    for k in range(pages):
+        page = doc.new_page(width=364.19, height=273.14)
+        page.draw_rect(fitz.Rect(0, 0, 364.19, 30), color=(0.2, 0.2, 0.6), fill=(0.2, 0.2, 0.6))
+        page.insert_text((12, 20), f"Slide {k // 4 + 1}", fontsize=14, color=(1, 1, 1))
+        for line in range(k % 4 + 1):
+            page.insert_text((20, 60 + line * 22), f"- Bullet point {line + 1} on page {k}", fontsize=11)
+        page.draw_circle(fitz.Point(290, 160), 50, color=(0.8, 0.3, 0.1), width=2)
+    doc.save(path)
+    doc.close()
+
+
+def legacy(pdf_path, out_dir):
+    """The previous create_video path: serial get_pixmap(dpi=300) per page."""
+    with fitz.open(pdf_path) as doc:
+        for j in range(len(doc)):
+            doc.load_page(j).get_pixmap(dpi=300).save(os.path.join(out_dir, f"temp_slide_page_{j}.png"))
+
+
+def parallel(pdf_path, out_dir):
+    with fitz.open(pdf_path) as doc:
+        pages = range(len(doc))
+    rasterise_pages(pdf_path, pages, out_dir)
+
+
+def _run_variant(name, pdf_path, queue):
+    with tempfile.TemporaryDirectory() as out_dir:
+        started = time.perf_counter()
+        {"legacy": legacy, "parallel": parallel}[name](pdf_path, out_dir)
+        elapsed = time.perf_counter() - started
+        output_bytes = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    queue.put({"seconds": elapsed, "peak_rss_kb": max(own, workers), "output_bytes": output_bytes})
+
+
+def measure(name, pdf_path):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_variant, args=(name, pdf_path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="Slides PDF to rasterise (a sample deck is generated if omitted)")
+    parser.add_argument("--pages", type=int, default=60, help="Pages in the generated sample deck")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = os.path.join(tmp, "sample.pdf")
+            make_sample_pdf(pdf_path, args.pages)
+
+        report = {"pdf": args.pdf or f"generated ({args.pages} pages)", "cpus": os.cpu_count()}
+        for name in ("legacy", "parallel"):
+            runs = [measure(name, pdf_path) for _ in range(args.repeat)]
+            report[name] = {
+                "best_seconds": round(min(r["seconds"] for r in runs), 3),
+                "peak_rss_mb": round(max(r["peak_rss_kb"] for r in runs) / 1024, 1),
+                "output_mb": round(runs[0]["output_bytes"] / 1e6, 2),
+            }
+        report["speedup"] = round(report["legacy"]["best_seconds"] / report["parallel"]["best_seconds"], 2)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
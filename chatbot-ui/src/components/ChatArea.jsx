@@ -8,12 +8,100 @@ import { Menu, FileText, Video, Download } from 'lucide-react';
 // Use environment variable for API URL, fallback to localhost for development
 const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
 
+// Long-running generation endpoints return a job id; poll until the job finishes
+const JOB_POLL_INTERVAL_MS = 2000;
+
+// Turns a /jobs/{id}/events payload into a one-line status, or null to keep the current one
+const describeProgress = (event) => {
+    if (event.type === 'node' && event.status === 'started') {
+        return `Running ${event.node.replace(/_/g, ' ')}...`;
+    }
+    if (event.type !== 'progress') {
+        return null;
+    }
+    if (event.stage === 'script') {
+        return `Writing script... slide ${event.index}: ${event.slide.title}`;
+    }
+    if (event.stage === 'encode') {
+        return `Encoding video... ${Math.round(event.percent)}%`;
+    }
+    if (event.stage === 'images' || event.stage === 'audio') {
+        return `Generating ${event.stage}... ${event.done}/${event.total} slides`;
+    }
+    if (event.stage === 'evaluator' || event.stage === 'optimiser') {
+        return `Reviewing script (iteration ${event.iteration})...`;
+    }
+    return null;
+};
+
+const runJob = async (path, body, fallbackError, onProgress) => {
+    const response = await fetch(`${API_URL}${path}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body),
+    });
+
+    if (!response.ok) {
+        const errorData = await response.json().catch(() => ({}));
+        throw new Error(errorData.detail || fallbackError);
+    }
+
+    const { job_id } = await response.json();
+
+    // Progress is best-effort; the polling loop below stays the source of truth
+    const events = onProgress ? new EventSource(`${API_URL}/jobs/${job_id}/events`) : null;
+    if (events) {
+        events.onmessage = (message) => {
+            const event = JSON.parse(message.data);
+            if (event.type === 'status' && event.status !== 'running') {
+                events.close();  // otherwise EventSource reconnects and replays the history
+                return;
+            }
+            const text = describeProgress(event);
+            if (text) {
+                onProgress(text);
+            }
+        };
+    }
+
+    try {
+        return await pollJob(job_id, fallbackError);
+    } finally {
+        if (events) {
+            events.close();
+        }
+    }
+};
+
+const pollJob = async (job_id, fallbackError) => {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const statusResponse = await fetch(`${API_URL}/jobs/${job_id}`);
+        if (!statusResponse.ok) {
+            throw new Error(fallbackError);
+        }
+        const job = await statusResponse.json();
+        if (job.status === 'succeeded') {
+            return job.result;
+        }
+        if (job.status === 'failed' || job.status === 'cancelled') {
+            throw new Error(job.error || fallbackError);
+        }
+    }
+};
+
 const ChatArea = ({ toggleSidebar, isSidebarOpen }) => {
     const [messages, setMessages] = useState([
         { id: 1, role: 'assistant', content: 'Hello! I am your AI assistant. How can I help you today?' }
     ]);
     const [isTyping, setIsTyping] = useState(false);
     const [currentProjectId, setCurrentProjectId] = useState(null);
+
+    const updateMessage = (id, content) => {
+        setMessages(prev => prev.map(message => message.id === id ? { ...message, content } : message));
+    };
     // targetAudience state removed
     const messagesEndRef = useRef(null);
 
@@ -90,24 +178,11 @@ const ChatArea = ({ toggleSidebar, isSidebarOpen }) => {
 
         try {
             // Phase 1: Generate Script
-            const response = await fetch(`${API_URL}/generate_script`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    topic: outline, // Pass outline as topic/context
-                    title: `Project #${projectId}`,
-                    project_id: projectId
-                }),
-            });
-
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => ({}));
-                throw new Error(errorData.detail || 'Failed to generate script');
-            }
-
-            const data = await response.json();
+            const data = await runJob('/generate_script', {
+                topic: outline, // Pass outline as topic/context
+                title: `Project #${projectId}`,
+                project_id: projectId
+            }, 'Failed to generate script', text => updateMessage(statusMessage.id, text));
 
             const newBotMessage = {
                 id: Date.now() + 1,
@@ -194,24 +269,11 @@ const ChatArea = ({ toggleSidebar, isSidebarOpen }) => {
 
         try {
             // Phase 2: Generate Slides PDF
-            const response = await fetch(`${API_URL}/generate_slides`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    json_script: jsonScript,
-                    project_id: projectId || currentProjectId,
-                    style_mode: "standard"
-                }),
-            });
-
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => ({}));
-                throw new Error(errorData.detail || 'Failed to generate slides PDF');
-            }
-
-            const data = await response.json();
+            const data = await runJob('/generate_slides', {
+                json_script: jsonScript,
+                project_id: projectId || currentProjectId,
+                style_mode: "standard"
+            }, 'Failed to generate slides PDF', text => updateMessage(statusMessage.id, text));
 
             const newBotMessage = {
                 id: Date.now() + 1,
@@ -240,26 +302,20 @@ const ChatArea = ({ toggleSidebar, isSidebarOpen }) => {
 
     const handleApprove = async (jsonScript, pdfPath, projectId) => {
         setIsTyping(true);
+        const statusMessage = {
+            id: Date.now(),
+            role: 'assistant',
+            content: `Generating video...`
+        };
+        setMessages(prev => [...prev, statusMessage]);
+
         try {
             // Phase 3: Generate Video
-            const response = await fetch(`${API_URL}/generate_video`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    json_script: jsonScript,
-                    pdf_path: pdfPath,
-                    project_id: projectId || currentProjectId
-                }),
-            });
-
-            if (!response.ok) {
-                const errorData = await response.json().catch(() => ({}));
-                throw new Error(errorData.detail || 'Failed to generate video');
-            }
-
-            const data = await response.json();
+            const data = await runJob('/generate_video', {
+                json_script: jsonScript,
+                pdf_path: pdfPath,
+                project_id: projectId || currentProjectId
+            }, 'Failed to generate video', text => updateMessage(statusMessage.id, text));
 
             const newBotMessage = {
                 id: Date.now() + 1,
@@ -0,0 +1,58 @@
+"""
+SQLite-backed LangGraph checkpoints, so a failed or interrupted job resumes
+at the node that failed instead of re-running the whole graph.
+"""
+import os
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.db")
+
+
+async def open_checkpointer(path=None):
+    """Opens (and creates, if needed) the checkpoint database. Close with close_checkpointer()."""
+    conn = await aiosqlite.connect(path or CHECKPOINT_DB)
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver
+
+
+async def close_checkpointer(saver):
+    await saver.conn.close()
+
+
+def thread_config(job_id, step="main"):
+    """Graph config for one of a job's graph runs; each run is its own checkpoint thread."""
+    return {"configurable": {"thread_id": f"{job_id}:{step}"}}
+
+
+def missing_assets(values):
+    """Narration clips and slide images a checkpointed state refers to that no longer exist."""
+    paths = list((values.get('audio_map') or {}).values())
+    paths += [slide.get('image_path') for slide in (values.get('json_script') or {}).get('slides', [])]
+    return [path for path in paths if path and not os.path.exists(path)]
+
+
+async def resume_point(graph, config):
+    """
+    Where an unfinished run should resume: (snapshot, config to stream from),
+    or None if there is nothing to resume. Cached assets may be evicted
+    between the failure and the resume, so when the latest state refers to
+    missing files, this rewinds to the newest checkpoint from before they
+    were produced and the node that produced them runs again.
+    """
+    latest = await graph.aget_state(config)
+    if not latest.next:
+        return None
+    if not missing_assets(latest.values):
+        # The thread's own config, so parallel nodes that already finished are not replayed
+        return latest, config
+    async for snapshot in graph.aget_state_history(config):
+        if snapshot.next and not missing_assets(snapshot.values):
+            return snapshot, snapshot.config
+    return None
+
+
+async def forget_thread(saver, job_id, step="main"):
+    """Drops a run's checkpoints once it has completed; they only exist to resume failures."""
+    await saver.adelete_thread(thread_config(job_id, step)["configurable"]["thread_id"])
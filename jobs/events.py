@@ -0,0 +1,76 @@
+"""
+In-memory fan-out of job progress events to Server-Sent Events subscribers.
+"""
+import asyncio
+import json
+from collections import OrderedDict
+
+
+class JobEvents:
+    """
+    Keeps each job's event history (so late subscribers can catch up) and
+    wakes every subscriber when a new event is published. Only the most
+    recent `max_jobs` jobs are remembered.
+    """
+
+    def __init__(self, max_jobs=200):
+        self.max_jobs = max_jobs
+        self._history = OrderedDict()
+        self._closed = set()
+        self._conditions = {}
+
+    def _condition(self, job_id):
+        if job_id not in self._conditions:
+            self._conditions[job_id] = asyncio.Condition()
+        return self._conditions[job_id]
+
+    def _events(self, job_id):
+        if job_id not in self._history:
+            self._history[job_id] = []
+            while len(self._history) > self.max_jobs:
+                old_id, _ = self._history.popitem(last=False)
+                self._conditions.pop(old_id, None)
+                self._closed.discard(old_id)
+        return self._history[job_id]
+
+    def has_history(self, job_id):
+        return job_id in self._history
+
+    def reset(self, job_id):
+        """Forgets a finished job's events so a resumed run streams afresh."""
+        self._history.pop(job_id, None)
+        self._closed.discard(job_id)
+
+    async def publish(self, job_id, event):
+        self._events(job_id).append(event)
+        condition = self._condition(job_id)
+        async with condition:
+            condition.notify_all()
+
+    async def close(self, job_id, event):
+        """Publishes the job's final event; subscribers disconnect after it."""
+        self._closed.add(job_id)
+        await self.publish(job_id, event)
+
+    async def subscribe(self, job_id, heartbeat=15.0):
+        """Yields SSE-formatted chunks: the backlog, then live events until the job closes."""
+        sent = 0
+        condition = self._condition(job_id)
+        while True:
+            events = self._history.get(job_id, [])
+            for event in events[sent:]:
+                yield f"data: {json.dumps(event)}\n\n"
+            sent = len(events)
+            if job_id in self._closed:
+                return
+
+            timed_out = False
+            async with condition:
+                if len(self._history.get(job_id, [])) == sent:
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=heartbeat)
+                    except asyncio.TimeoutError:
+                        timed_out = True
+            if timed_out:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
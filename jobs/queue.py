@@ -0,0 +1,120 @@
+"""
+Bounded background worker pool for the long-running /generate_* endpoints.
+"""
+import asyncio
+import json
+import os
+import traceback
+from jobs.events import JobEvents
+from jobs.store import JobStore, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
+
+
+class JobQueue:
+    """
+    Runs registered handlers for queued jobs on JOB_WORKERS asyncio workers.
+    Jobs are persisted in the JobStore, so work queued or interrupted by a
+    restart is picked up again on start().
+    """
+
+    def __init__(self, store=None, workers=None):
+        self.store = store or JobStore()
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.events = JobEvents()
+        self._handlers = {}
+        self._queue = None
+        self._tasks = []
+        self._running = {}
+
+    def handler(self, kind):
+        """Decorator registering `async fn(job_id, payload) -> dict` for a job kind."""
+        def register(fn):
+            self._handlers[kind] = fn
+            return fn
+        return register
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        for job in self.store.unfinished():
+            if job.status == RUNNING:
+                print(f"Re-queuing job {job.id} interrupted by restart")
+                self.store.update(job.id, status=QUEUED)
+            self._queue.put_nowait(job.id)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    async def stop(self):
+        # Interrupted jobs stay "running" in the store and are re-queued on the next start()
+        for task in list(self._running.values()) + self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._running.values(), *self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, kind, payload):
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = self.store.create(kind, payload)
+        self._queue.put_nowait(job.id)
+        return job
+
+    def set_stage(self, job_id, stage):
+        self.store.update(job_id, stage=stage)
+
+    async def publish(self, job_id, event):
+        """Forwards a progress event to the job's /events subscribers."""
+        await self.events.publish(job_id, event)
+
+    def resume(self, job_id):
+        """
+        Re-queues a failed or cancelled job. Its handler runs again and the
+        graph continues from its last checkpoint. Returns the job, or None.
+        """
+        job = self.store.get(job_id)
+        if job is None or job.status not in (FAILED, CANCELLED):
+            return None
+        self.events.reset(job_id)
+        job = self.store.update(job_id, status=QUEUED, error=None)
+        self._queue.put_nowait(job_id)
+        return job
+
+    async def cancel(self, job_id):
+        """Cancels a queued or running job. Returns False if it already finished."""
+        job = self.store.get(job_id)
+        if job is None or job.status not in (QUEUED, RUNNING):
+            return False
+        self.store.update(job_id, status=CANCELLED)
+        task = self._running.get(job_id)
+        if task:
+            task.cancel()  # the worker closes the job's events once the handler stops
+        else:
+            # Never started, so no worker will close its events
+            await self.events.close(job_id, {"type": "status", "status": CANCELLED})
+        return True
+
+    async def _worker(self, n):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self.store.get(job_id)
+                if job is None or job.status != QUEUED:
+                    continue
+                handler = self._handlers[job.kind]
+                self.store.update(job_id, status=RUNNING)
+                await self.publish(job_id, {"type": "status", "status": RUNNING})
+                task = asyncio.create_task(handler(job_id, json.loads(job.payload)))
+                self._running[job_id] = task
+                try:
+                    result = await task
+                    self.store.update(job_id, status=SUCCEEDED, result=result)
+                    await self.events.close(job_id, {"type": "status", "status": SUCCEEDED, "result": result})
+                except asyncio.CancelledError:
+                    if not task.cancelled():
+                        raise  # the worker itself is shutting down
+                    print(f"Job {job_id} cancelled")
+                    await self.events.close(job_id, {"type": "status", "status": CANCELLED})
+                except Exception as e:
+                    traceback.print_exc()
+                    self.store.update(job_id, status=FAILED, error=str(e))
+                    await self.events.close(job_id, {"type": "status", "status": FAILED, "error": str(e)})
+                finally:
+                    self._running.pop(job_id, None)
+            finally:
+                self._queue.task_done()
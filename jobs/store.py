@@ -0,0 +1,91 @@
+"""
+SQLite-backed persistence for background jobs.
+"""
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import create_engine, String, Text, DateTime, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+
+JOBS_DB_URL = os.getenv("JOBS_DB_URL", "sqlite:///jobs.db")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32))
+    status: Mapped[str] = mapped_column(String(16), default=QUEUED, index=True)
+    stage: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    payload: Mapped[str] = mapped_column(Text, default="{}")
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now, onupdate=_now)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class JobStore:
+    """Small synchronous repository; every call uses its own short session."""
+
+    def __init__(self, url=JOBS_DB_URL):
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        self.engine = create_engine(url, connect_args=connect_args)
+        Base.metadata.create_all(self.engine)
+        self._session = sessionmaker(self.engine, expire_on_commit=False)
+
+    def create(self, kind, payload, job_id=None):
+        job = Job(id=job_id or uuid.uuid4().hex, kind=kind, status=QUEUED, payload=json.dumps(payload))
+        with self._session() as session:
+            session.add(job)
+            session.commit()
+        return job
+
+    def get(self, job_id):
+        with self._session() as session:
+            return session.get(Job, job_id)
+
+    def update(self, job_id, result=None, **fields):
+        with self._session() as session:
+            job = session.get(Job, job_id)
+            if job is None:
+                return None
+            for name, value in fields.items():
+                setattr(job, name, value)
+            if result is not None:
+                job.result = json.dumps(result)
+            session.commit()
+            return job
+
+    def unfinished(self):
+        """Jobs that were queued or running when the process last stopped, oldest first."""
+        with self._session() as session:
+            query = select(Job).where(Job.status.in_((QUEUED, RUNNING))).order_by(Job.created_at)
+            return list(session.scalars(query))
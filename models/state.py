@@ -18,19 +18,30 @@ class Slide(TypedDict):
 class AgentState(TypedDict):
     topic: str
     project_id: Optional[int]
+    job_id: Optional[str]
+    workspace_dir: Optional[str]
     outline: Optional[str]
     mode: str
+    target_audience: Optional[str]
+    tts_backend: Optional[str]
+    image_backend: Optional[str]
+    cache_bypass: Optional[bool]
     json_script: dict
     script_pdf_path: Optional[str]
     slides_pdf_path: Optional[str]
     pdf_path: Optional[str]
     image_paths: List[str]
     latex_content: Optional[str]
+    latex_preamble: Optional[str]
+    latex_frames: List[str]
     audio_map: dict
     video_path: Optional[str]
+    error: Optional[str]
     evaluation_iteration: int
     evaluation_passed: bool
     evaluation_feedback: Optional[str]
+    evaluation_violations: List[dict]
+    optimiser_usage: List[dict]
 
 
 class SlideModel(BaseModel):
@@ -4,9 +4,13 @@ Evaluator node for checking script quality.
 import os
 import json
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 from models.state import AgentState
+from utils.stage_limits import limit_stage
+from utils.genai_client import get_client
+from utils.progress import report_progress
+from utils.script_lint import lint_script, format_violations
+from utils.llm_cache import get_llm_cache
 
 load_dotenv()
 
@@ -15,6 +19,8 @@ EVALUATOR_PROMPT = """
 You are a strict quality control evaluator for Spoken Tutorial educational scripts.
 
 Analyze the provided script and determine if it meets the following quality standards.
+Mechanical rules (sentence length, arrows and symbols, clichés, narration line count) have
+already been checked automatically and passed, so judge only the standards below.
 
 === SPOKEN TUTORIAL PRINCIPLES (CRITICAL) ===
 Check for:
@@ -23,9 +29,8 @@ Check for:
 3. **Beginner-Friendly Steps**: Examples are broken into simple, actionable steps.
 4. **Translation-Ready**: Avoids complex vocabulary, idioms, or difficult English phrases.
 5. **Skill Building Focus**: Script builds a skill, not just delivers information.
-6. **NO Clichés**: Reject if narration contains phrases like "exciting journey", "let's dive in", "embark on", "delve into", "master the art of", "unlock", "game-changer".
-7. **Natural Speech Flow**: Narration must sound natural when spoken aloud, like a teacher talking (not reading). Check for awkward phrasing or unnatural sentence structures.
-8. **Learning Objectives Met**: Check that:
+6. **Natural Speech Flow**: Narration must sound natural when spoken aloud, like a teacher talking (not reading). Check for awkward phrasing or unnatural sentence structures.
+7. **Learning Objectives Met**: Check that:
    * Only achievable objectives are stated
    * The script content ACTUALLY teaches these objectives
    * Objectives are realistic for 3-4 minutes
@@ -42,34 +47,44 @@ Check for the presence and quality of:
 
 === FORMATTING & STYLE CHECKS ===
 Ensure the following conditions are met:
-1. **Sentence Length**: EVERY narration sentence must be under 80 characters (including spaces).
-2. **New Lines**: Start EACH new sentence on a new line.
-3. **Narration Style**: No arrows (->), hyphens (-), or symbols that cannot be narrated.
-4. **Complete Sentences**: No sentences cut in the middle.
-5. **Structure**: Maintain 2 column format (Visual Cue and Narration).
+1. **New Lines**: Start EACH new sentence on a new line.
+2. **Complete Sentences**: No sentences cut in the middle.
+3. **Structure**: Maintain 2 column format (Visual Cue and Narration).
 
 === OUTPUT ===
 If the script meets ALL standards, return:
 {{
   "passed": true,
-  "feedback": "Script meets all quality standards."
+  "feedback": "Script meets all quality standards.",
+  "issues": []
 }}
 
 If the script fails ANY standard, return:
 {{
   "passed": false,
-  "feedback": "Specific feedback listing EXACTLY what failed. Example: 'Slide 3 narration has sentences > 80 chars', 'Missing bridge anticipation in Slide 5'."
+  "feedback": "Specific feedback listing EXACTLY what failed. Example: 'Slide 3 narration does not explain why before how', 'Missing bridge anticipation in Slide 5'.",
+  "issues": [
+    {{"slide": 3, "feedback": "Narration does not explain why before how."}},
+    {{"slide": 5, "feedback": "Missing bridge anticipation."}}
+  ]
 }}
 
+List one issue per problem. "slide" is the 1-based slide number; use 0 only for
+problems that span the whole script (e.g. objectives not taught, assignment unrelated).
+
 Script to evaluate:
 {script_content}
 """
 
 def evaluate_quality(state: AgentState):
-    """Evaluates the script quality using a defined prompt."""
+    """
+    Evaluates the script quality. Mechanical rules are checked locally first;
+    only a script that passes them is sent to the LLM for the subjective checks.
+    """
     print("Evaluating script quality...")
     json_script = state.get('json_script')
     iteration = state.get('evaluation_iteration', 0)
+    report_progress("evaluator", iteration=iteration + 1)
     
     # CRITICAL: If no script exists, force proceed to avoid infinite loop
     if not json_script or not json_script.get('slides'):
@@ -80,10 +95,28 @@ def evaluate_quality(state: AgentState):
             "evaluation_iteration": iteration + 1
         }
 
-    client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    violations = lint_script(json_script)
+    if violations:
+        print(f"✗ Script failed local checks (Iteration {iteration}): {len(violations)} violations, skipping LLM evaluation.")
+        return {
+            "evaluation_passed": False,
+            "evaluation_feedback": format_violations(violations),
+            "evaluation_violations": violations,
+            "evaluation_iteration": iteration + 1
+        }
+    print("✓ Script passed local checks.")
+
+    return _llm_evaluate(json_script, iteration, bypass=bool(state.get('cache_bypass')))
+
+@limit_stage("llm")
+def _llm_evaluate(json_script, iteration, bypass=False):
+    """Asks the LLM to judge the pedagogical and language standards."""
+    client = get_client()
     
     try:
-        response = client.models.generate_content(
+        # An unchanged script is re-scored from the cache instead of a new call
+        response = get_llm_cache().generate(
+            client,
             model='gemini-2.5-flash',  # Use Flash for faster evaluation
             contents=EVALUATOR_PROMPT.format(script_content=json.dumps(json_script, indent=2)),
             config=types.GenerateContentConfig(
@@ -92,11 +125,23 @@ def evaluate_quality(state: AgentState):
                     "type": "object",
                     "properties": {
                         "passed": {"type": "boolean"},
-                        "feedback": {"type": "string"}
+                        "feedback": {"type": "string"},
+                        "issues": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "slide": {"type": "integer"},
+                                    "feedback": {"type": "string"}
+                                },
+                                "required": ["slide", "feedback"]
+                            }
+                        }
                     },
-                    "required": ["passed", "feedback"]
+                    "required": ["passed", "feedback", "issues"]
                 }
-            )
+            ),
+            bypass=bypass
         )
         
         # Parse JSON response
@@ -104,6 +149,11 @@ def evaluate_quality(state: AgentState):
         
         passed = result.get('passed', False)
         feedback = result.get('feedback', '')
+        # Same shape as the local lint violations, so the optimiser can patch per slide
+        violations = [
+            {"slide": issue.get('slide', 0), "rule": "review", "message": issue.get('feedback', '')}
+            for issue in result.get('issues') or []
+        ]
         
         if passed:
             print("✓ Script passed evaluation.")
@@ -113,6 +163,7 @@ def evaluate_quality(state: AgentState):
         return {
             "evaluation_passed": passed,
             "evaluation_feedback": feedback,
+            "evaluation_violations": [] if passed else violations,
             "evaluation_iteration": iteration + 1
         }
         
@@ -5,236 +5,421 @@ import os
 import time
 import random
 import wave
+import asyncio
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 from models.state import AgentState
+from utils.audio_utils import write_narration_clip, NARRATION_FORMAT
+from utils.asset_cache import get_cache, make_key
+from utils.rate_limit import image_rate_limiter, is_transient_error
+from utils.tts_backends import tts_chain
+from utils.progress import report_progress
+from utils.genai_client import get_client, model_limit
+from utils.stage_progress import stage_progress
+from utils.segment_encoder import segment_renderer
+from utils.image_backends import local_image_backend, DEFAULT_IMAGE_BACKEND, IMAGE_FALLBACK
+from utils import prefetch
 
 load_dotenv()
 
-@retry(
-    retry=retry_if_exception_type((ResourceExhausted, ServiceUnavailable)),
+# Audience-specific image style prefixes
+AUDIENCE_STYLE_PREFIX = {
+    'kids': "Hand-drawn crayon sketch, colorful, playful, child-friendly illustration,",
+    'students': "Hand-drawn pencil sketch, educational diagram, clear and informative,",
+    'professionals': "Minimalist architectural sketch, clean lines, professional, blueprint style,",
+    'general': "Artistic ink sketch, hand-drawn illustration, high quality,"
+}
+
+IMAGE_MODEL = 'gemini-2.5-flash-image'
+IMAGE_ASPECT_RATIO = "1:1"
+VIDEO_MODEL = 'veo-3.1-generate-preview'
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Start each slide's narration and image while the script is still streaming
+# (full_production only, where an approved script goes straight on to media)
+PREFETCH_MEDIA = os.getenv("PREFETCH_MEDIA", "1") != "0"
+
+
+def _image_cache():
+    # Images and Veo clips share one cache; clips are large, so allow more room
+    return get_cache("images", default_max_mb=2048)
+
+
+def _image_cache_key(prompt):
+    return make_key(prompt, IMAGE_MODEL, IMAGE_ASPECT_RATIO)
+
+
+def _video_cache_key(video_prompt):
+    return make_key(video_prompt, VIDEO_MODEL)
+
+
+def _audio_cache_key(text, backend, target_audience):
+    return make_key(text, *backend.cache_id(target_audience), NARRATION_FORMAT)
+
+
+def _style_prompt(slide, target_audience):
+    return f"{AUDIENCE_STYLE_PREFIX.get(target_audience, AUDIENCE_STYLE_PREFIX['general'])} {slide['image_prompt']}"
+
+
+def _narration_text(slide):
+    """The slide's narration lines as the text of one clip, without markdown."""
+    narrations = slide.get('narration', [])
+    if isinstance(narrations, str): narrations = [narrations]
+    if not narrations: narrations = [slide.get('title', 'Slide')]
+    
+    # Merge all narration parts for this slide into one text
+    full_narration = " ".join(narrations)
+    
+    # Clean markdown formatting
+    return full_narration.replace('**', '').replace('__', '').replace('*', '').replace('_', '').replace('#', '')
+
+
+# Retries wrap single requests, so a transient failure never repeats finished slides
+request_retry = retry(
+    retry=retry_if_exception(is_transient_error),
     wait=wait_exponential(multiplier=4, min=4, max=60),
-    stop=stop_after_attempt(5)
+    stop=stop_after_attempt(5),
+    reraise=True
 )
-def generate_images(state: AgentState):
-    """Generates images."""
-    print("Generating images...")
+
+
+@request_retry
+def _request_image(client, prompt):
+    with model_limit(IMAGE_MODEL):
+        return client.models.generate_content(
+            model=IMAGE_MODEL,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_modalities=["IMAGE"],
+                image_config=types.ImageConfig(aspect_ratio=IMAGE_ASPECT_RATIO),
+            ),
+        )
+
+
+@request_retry
+async def _start_video(client, video_prompt):
+    async with model_limit(VIDEO_MODEL):
+        return await client.aio.models.generate_videos(
+            model=VIDEO_MODEL,
+            prompt=video_prompt,
+        )
+
+
+def _generate_image(client, i, prompt, label="Image"):
+    """Generates a single still image for slide `i` into the image cache. Returns its path or None."""
+    response = _request_image(client, prompt)
+    if not response.parts:
+        print(f"No image parts returned for slide {i+1}")
+        return None
+
+    for part in response.parts:
+        if part.inline_data:
+            try:
+                generated_image = part.as_image()
+                image_path = _image_cache().store(_image_cache_key(prompt), ".png", generated_image.save)
+                print(f"✓ {label} generated for slide {i+1}")
+                return image_path
+            except Exception as e_img:
+                print(f"Error saving image for slide {i+1}: {e_img}")
+    return None
+
+
+async def _download_to_file(url, path, headers=None):
+    """Streams `url` to `path` in chunks instead of buffering the whole body in memory."""
+    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, read=300.0), follow_redirects=True) as http:
+        async with http.stream("GET", url, headers=headers) as response:
+            if response.status_code != 200:
+                raise Exception(f"Failed to download video: {response.status_code}")
+            with open(path, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+
+
+async def _generate_video(client, api_key, i, video_prompt):
+    """Generates a Veo video for slide `i` into the image cache. Returns its path."""
+    operation = await _start_video(client, video_prompt)
+    print(f"Operation started for slide {i+1}: {operation.name}")
+
+    # Poll with exponential backoff; other slides keep running meanwhile
+    delay = float(os.getenv("VEO_POLL_INITIAL_SECONDS", "5"))
+    max_delay = float(os.getenv("VEO_POLL_MAX_SECONDS", "30"))
+    while not operation.done:
+        await asyncio.sleep(delay)
+        operation = await client.aio.operations.get(operation)
+        delay = min(delay * 2, max_delay)
+
+    print(f"Operation done for slide {i+1}!")
+    if not operation.result:
+        raise Exception("Operation completed but no result returned")
+
+    video_uri = operation.result.generated_videos[0].video.uri
+    print(f"Downloading video for slide {i+1} from {video_uri}...")
+
+    video_path = await _image_cache().astore(
+        _video_cache_key(video_prompt), ".mp4",
+        lambda path: _download_to_file(video_uri, path, headers={"x-goog-api-key": api_key}),
+    )
+    print(f"✓ Video generated for slide {i+1}")
+    return video_path
+
+
+def _generate_slide_image(client, i, prompt, target_audience, label="Image"):
+    """Generates the still image for one slide. Returns the image path or None."""
+    try:
+        print(f"Generating image for slide {i+1} (Audience: {target_audience})...")
+        return _generate_image(client, i, prompt, label=label)
+    except Exception as e:
+        print(f"Failed to generate image for slide {i+1}: {e}")
+        return None
+
+
+async def _prefetch_image(client, i, prompt, target_audience):
+    await image_rate_limiter().acquire()
+    return await asyncio.to_thread(_generate_slide_image, client, i, prompt, target_audience)
+
+
+def should_prefetch(state):
+    return PREFETCH_MEDIA and state.get('mode') == "full_production"
+
+
+def prefetch_slide(state, i, slide):
+    """
+    Starts the narration clip and still image for slide `i` as soon as the
+    script stream has produced it; must be called on the graph's event loop.
+    Both land in the asset caches under the keys generate_audio and
+    generate_images look up, and those stages join requests still in flight.
+    A slide the optimiser later rewrites simply misses the cache. Veo clips
+    are not prefetched, being slow and costly to waste.
+    """
+    target_audience = state.get('target_audience') or 'general'
+
+    tts = tts_chain(state)
+    text = _narration_text(slide)
+    audio_key = _audio_cache_key(text, tts.primary, target_audience)
+    if not os.path.exists(get_cache("audio").path_for(audio_key, ".wav")):
+        prefetch.start(audio_key, lambda: _synthesize_clip(tts, text, target_audience, i))
+
+    if slide.get('image_prompt') and not slide.get('is_video_slide') \
+            and not local_image_backend(state.get('image_backend') or DEFAULT_IMAGE_BACKEND):
+        prompt = _style_prompt(slide, target_audience)
+        image_key = _image_cache_key(prompt)
+        if not os.path.exists(_image_cache().path_for(image_key, ".png")):
+            prefetch.start(image_key, lambda: _prefetch_image(get_client(), i, prompt, target_audience))
+
+
+def _render_local_images(slides, backend, target_audience):
+    """Draft/stub images: drawn locally in milliseconds, no model calls."""
+    pending = [(i, slide) for i, slide in enumerate(slides) if slide.get('image_prompt')]
+    for done, (i, slide) in enumerate(pending, start=1):
+        slide['image_path'] = backend.render(slide, target_audience, _image_cache())
+        report_progress("images", done=done, total=len(pending), slide=i + 1, ok=True)
+
+
+async def generate_images(state: AgentState):
+    """
+    Generates images for all slides concurrently.
+
+    The run's image backend (request `image_backend`, else IMAGE_BACKEND) may
+    instead be "draft", which draws title cards locally for instant previews,
+    or "stub" for tests. Slides whose generated image fails get a draft card.
+
+    At most IMAGE_MAX_CONCURRENCY image requests are in flight, and request
+    starts are paced by a token bucket (IMAGE_REQUESTS_PER_MINUTE / IMAGE_BURST).
+    Veo operations for video slides are all started up front and polled
+    concurrently while the still images are being generated. Finished slides
+    are recorded in the workspace, so a retried run only redoes the rest.
+    """
     json_script = state.get('json_script')
     slides = json_script['slides']
-    target_audience = state.get('target_audience', 'general')
-    
-    if os.path.exists("generated_images"):
-        shutil.rmtree("generated_images")
-    os.makedirs("generated_images")
-    
-    # Audience-specific image style prefixes
-    audience_style_prefix = {
-        'kids': "Hand-drawn crayon sketch, colorful, playful, child-friendly illustration,",
-        'students': "Hand-drawn pencil sketch, educational diagram, clear and informative,",
-        'professionals': "Minimalist architectural sketch, clean lines, professional, blueprint style,",
-        'general': "Artistic ink sketch, hand-drawn illustration, high quality,"
-    }
-    
-    style_prefix = audience_style_prefix.get(target_audience, audience_style_prefix['general'])
-    
+    target_audience = state.get('target_audience') or 'general'
+
+    local_backend = local_image_backend(state.get('image_backend') or DEFAULT_IMAGE_BACKEND)
+    if local_backend:
+        started = time.perf_counter()
+        await asyncio.to_thread(_render_local_images, slides, local_backend, target_audience)
+        print(f"✓ Rendered {local_backend.name} images in {time.perf_counter() - started:.3f}s")
+        return {"json_script": json_script}
+
+    print("Generating images...")
+    fallback = local_image_backend(IMAGE_FALLBACK)
+    image_cache = _image_cache()
+    progress = stage_progress(state, "images")
+
+    style_prefix = AUDIENCE_STYLE_PREFIX.get(target_audience, AUDIENCE_STYLE_PREFIX['general'])
+
     api_key = os.getenv("GOOGLE_API_KEY")
-    client = genai.Client(api_key=api_key)
-        
-    for i, slide in enumerate(slides):
-        prompt = slide.get('image_prompt')
-        if prompt:
-            # Check if this is a video slide
-            if slide.get('is_video_slide'):
-                try:
-                    # Use dedicated video prompt if available, otherwise fallback to image prompt
-                    raw_video_prompt = slide.get('video_prompt') or prompt
-                    print(f"Generating VIDEO for slide {i+1} (Audience: {target_audience}) using Veo...")
-                    video_prompt = f"{style_prefix} {raw_video_prompt}. Cinematic, smooth motion, high quality."
-                    
-                    # Use generate_videos instead of generate_content
-                    operation = client.models.generate_videos(
-                        model='veo-3.1-generate-preview',
-                        prompt=video_prompt,
-                    )
-                    print(f"Operation started: {operation.name}")
-                    
-                    # Poll for completion
-                    while True:
-                        time.sleep(5)
-                        print(".", end="", flush=True)
-                        op_status = client.operations.get(operation)
-                        if op_status.done:
-                            print("\nOperation done!")
-                            if op_status.result:
-                                video_uri = op_status.result.generated_videos[0].video.uri
-                                print(f"Downloading video from {video_uri}...")
-                                
-                                # Download video
-                                import requests
-                                headers = {"x-goog-api-key": api_key}
-                                vid_response = requests.get(video_uri, headers=headers)
-                                
-                                if vid_response.status_code == 200:
-                                    video_path = f"generated_images/slide_{i}.mp4"
-                                    with open(video_path, "wb") as f:
-                                        f.write(vid_response.content)
-                                    slide['image_path'] = os.path.abspath(video_path)
-                                    print(f"✓ Video generated for slide {i+1}")
-                                else:
-                                    raise Exception(f"Failed to download video: {vid_response.status_code}")
-                            else:
-                                raise Exception("Operation completed but no result returned")
-                            break
-                    
-                except Exception as e:
-                    print(f"Failed to generate video for slide {i+1}: {e}")
-                    # Fallback to image generation if video fails
-                    print("Falling back to image generation...")
-                    try:
-                        prompt = f"{style_prefix} {prompt}"
-                        response = client.models.generate_content(
-                            model='gemini-2.5-flash-image',
-                            contents=prompt,
-                        config=types.GenerateContentConfig(
-                            response_modality=["IMAGE"],
-                            image_config=types.ImageConfig(aspect_ratio="1:1"),
-                        ),
-                        )
-                        if response.parts:
-                            for part in response.parts:
-                                if part.inline_data:
-                                    try:
-                                        generated_image = part.as_image()
-                                        image_path = f"generated_images/slide_{i}.png"
-                                        generated_image.save(image_path)
-                                        slide['image_path'] = os.path.abspath(image_path)
-                                        print(f"✓ Fallback image generated for slide {i+1}")
-                                        break
-                                    except Exception as e_img:
-                                        print(f"Error saving fallback image for slide {i+1}: {e_img}")
-                        else:
-                            print(f"No image parts returned for fallback slide {i+1}")
-                    except Exception as e2:
-                        print(f"Failed to generate fallback image for slide {i+1}: {e2}")
-
-            else:
-                # Standard Image Generation
-                prompt = f"{style_prefix} {prompt}"
-                try:
-                    print(f"Generating image for slide {i+1} (Audience: {target_audience})...")
-                    response = client.models.generate_content(
-                        model='gemini-2.5-flash-image',
-                        contents=prompt,
-                        config=types.GenerateContentConfig(
-                            response_modalities=["IMAGE"],
-                            image_config=types.ImageConfig(aspect_ratio="1:1"),
-                        ),
-                    )
-                    if response.parts:
-                        for part in response.parts:
-                            if part.inline_data:
-                                try:
-                                    generated_image = part.as_image()
-                                    image_path = f"generated_images/slide_{i}.png"
-                                    generated_image.save(image_path)
-                                    slide['image_path'] = os.path.abspath(image_path)
-                                    print(f"✓ Image generated for slide {i+1}")
-                                    break
-                                except Exception as e_img:
-                                    print(f"Error saving image for slide {i+1}: {e_img}")
-                    else:
-                         print(f"No image parts returned for slide {i+1}")
-                except Exception as e:
-                    print(f"Failed to generate image for slide {i+1}: {e}")
-                
+    client = get_client()
+
+    max_in_flight = int(os.getenv("IMAGE_MAX_CONCURRENCY", "8"))
+    semaphore = asyncio.Semaphore(max_in_flight)
+    bucket = image_rate_limiter()
+    latencies = {}
+    loop = asyncio.get_running_loop()
+    # The image SDK call blocks, so each slide runs in its own worker thread
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+
+    async def run_image(i, prompt, label="Image"):
+        # Unchanged prompts cost no image calls
+        cached_path = image_cache.get(_image_cache_key(prompt), ".png") or await prefetch.join(_image_cache_key(prompt))
+        if cached_path:
+            print(f"✓ Reused cached image for slide {i+1}")
+            return cached_path
+        async with semaphore:
+            await bucket.acquire()
+            return await loop.run_in_executor(
+                executor, _generate_slide_image, client, i, prompt, target_audience, label
+            )
+
+    async def run_slide(i, slide):
+        started = time.perf_counter()
+        prompt = slide['image_prompt']
+        slide_key = make_key(style_prefix, prompt, slide.get('is_video_slide'), slide.get('video_prompt'),
+                             IMAGE_MODEL, VIDEO_MODEL)
+        image_path = progress.get(i, slide_key)
+
+        if image_path:
+            print(f"✓ Slide {i+1} already done in an earlier attempt")
+        elif slide.get('is_video_slide'):
+            try:
+                # Use dedicated video prompt if available, otherwise fallback to image prompt
+                raw_video_prompt = slide.get('video_prompt') or prompt
+                print(f"Generating VIDEO for slide {i+1} (Audience: {target_audience}) using Veo...")
+                video_prompt = f"{style_prefix} {raw_video_prompt}. Cinematic, smooth motion, high quality."
+                image_path = image_cache.get(_video_cache_key(video_prompt), ".mp4")
+                if image_path:
+                    print(f"✓ Reused cached video for slide {i+1}")
+                else:
+                    image_path = await _generate_video(client, api_key, i, video_prompt)
+            except Exception as e:
+                print(f"Failed to generate video for slide {i+1}: {e}")
+                # Fallback to image generation if video fails
+                print("Falling back to image generation...")
+                image_path = await run_image(i, f"{style_prefix} {prompt}", label="Fallback image")
+        else:
+            image_path = await run_image(i, f"{style_prefix} {prompt}")
+
+        latencies[i] = time.perf_counter() - started
+        if image_path:
+            slide['image_path'] = image_path
+            progress.record(i, slide_key, image_path)
+        elif fallback:
+            # Not recorded as done, so a retried run tries the real image again
+            image_path = slide['image_path'] = fallback.render(slide, target_audience, image_cache)
+            print(f"⚠ Slide {i+1}: no generated image, using a {fallback.name} card")
+        report_progress("images", done=len(latencies), total=len(pending), slide=i + 1, ok=bool(image_path))
+
+    # Schedule video slides first so their Veo operations start immediately
+    pending = [(i, slide) for i, slide in enumerate(slides) if slide.get('image_prompt')]
+    pending.sort(key=lambda item: not item[1].get('is_video_slide'))
+
+    stage_started = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_slide(i, slide) for i, slide in pending))
+    finally:
+        executor.shutdown(wait=False)
+
+    for i in sorted(latencies):
+        print(f"Slide {i+1}: image stage took {latencies[i]:.2f}s")
+    stats = image_cache.stats()
+    print(f"✓ Image stage finished in {time.perf_counter() - stage_started:.2f}s "
+          f"({len(latencies)} slides, max {max_in_flight} images in flight, "
+          f"cache hits {stats['hits']}, misses {stats['misses']})")
+
     return {"json_script": json_script}
-@retry(
-    retry=retry_if_exception_type((ResourceExhausted, ServiceUnavailable)),
-    wait=wait_exponential(multiplier=4, min=4, max=60),
-    stop=stop_after_attempt(5)
-)
+
+async def _synthesize_clip(tts, text, target_audience, i):
+    """Synthesizes one narration clip into the audio cache. Returns its path, or None."""
+    # Backends pace themselves (Gemini through the quota scheduler)
+    result = await tts.synthesize(text, target_audience)
+    if not result:
+        return None
+    backend, pcm, rate = result
+    # Audio from a fallback is cached under its own key, but the slide is done either way
+    key = _audio_cache_key(text, backend, target_audience)
+    path = get_cache("audio").store(key, ".wav", lambda tmp_path: write_narration_clip(tmp_path, pcm, rate=rate))
+    print(f"✓ Generated audio for slide {i} with {backend.name}")
+    return path
+
+
 async def generate_audio(state: AgentState):
-    """Generates audio narration for each slide using Gemini 2.5 Flash."""
-    print("Generating audio narration with Gemini 2.5 Flash...")
+    """
+    Generates audio narration for each slide with the run's TTS backend
+    (Gemini 2.5 Flash by default), failing over to the next backend when it
+    is rate-limited.
+
+    In segmented render mode, when the slides PDF already exists, each slide's
+    video segment starts encoding as soon as its narration is ready.
+    """
     json_script = state['json_script']
     slides = json_script['slides']
     audio_map = {}
+    audio_cache = get_cache("audio")
+    progress = stage_progress(state, "audio")
     
-    if not os.path.exists("audio"):
-        os.makedirs("audio")
-        
-    api_key = os.getenv("GOOGLE_API_KEY")
-    client = genai.Client(api_key=api_key)
-    
-    target_audience = state.get('target_audience', 'general')
-    
-    # Audience-specific voice prompts
-    tts_prompts = {
-        'kids': "Read aloud in a fun, energetic, and playful tone, like a storyteller for children.",
-        'students': "Read aloud in a clear, educational, and engaging tone, like a friendly teacher.",
-        'professionals': "Read aloud in a professional, confident, and concise tone, suitable for a business presentation.",
-        'general': "Read aloud in a warm, welcoming, and conversational tone."
-    }
-    
-    voice_instruction = tts_prompts.get(target_audience, tts_prompts['general'])
-    
-    # Audience-specific voices
-    voice_mapping = {
-        'kids': "Tevel",
-        'students': "Kore",
-        'professionals': "Ophir",
-        'general': "Kore"
-    }
+    target_audience = state.get('target_audience') or 'general'
+    tts = tts_chain(state)
+    print(f"Generating audio narration with {' -> '.join(backend.name for backend in tts.backends)}...")
     
-    selected_voice = voice_mapping.get(target_audience, "Kore")
-    
-    for i, slide in enumerate(slides):
-        narrations = slide.get('narration', [])
-        if isinstance(narrations, str): narrations = [narrations]
-        if not narrations: narrations = [slide.get('title', 'Slide')]
-        
-        # Merge all narration parts for this slide into one text
-        full_narration = " ".join(narrations)
-        
-        # Clean markdown formatting
-        full_narration = full_narration.replace('**', '').replace('__', '').replace('*', '').replace('_', '').replace('#', '')
+    renderer = segment_renderer(state)
+    segment_jobs = []
+
+    def start_segment(i):
+        if renderer:
+            segment_jobs.append(asyncio.create_task(asyncio.to_thread(renderer.encode, i, audio_map[i])))
+
+    completed = []
+
+    async def synthesize_slide(i, slide):
+        try:
+            await _synthesize_slide(i, slide)
+        finally:
+            completed.append(i)
+            report_progress("audio", done=len(completed), total=len(slides), slide=i + 1, ok=i in audio_map)
+
+    async def _synthesize_slide(i, slide):
+        full_narration = _narration_text(slide)
         
-        audio_path = f"audio/slide_{i}.wav"
+        # Reuse audio for narration that has not changed since the last render,
+        # or whose synthesis the script stage already started
+        cache_key = _audio_cache_key(full_narration, tts.primary, target_audience)
+        cached_path = progress.get(i, cache_key) or audio_cache.get(cache_key, ".wav") or await prefetch.join(cache_key)
+        if cached_path:
+            audio_map[i] = cached_path
+            progress.record(i, cache_key, cached_path)
+            print(f"✓ Reused cached audio for slide {i}")
+            start_segment(i)
+            return
         
-        # Use Gemini 2.5 Flash TTS
         try:
-            # Rate limit handling: 10 RPM = 1 request every 6 seconds.
-            # We wait 7 seconds to be safe.
-            await asyncio.sleep(7)
-            
-            print(f"Generating audio for slide {i} (Audience: {target_audience}, Voice: {selected_voice})...")
-            response = client.models.generate_content(
-                model='gemini-2.5-flash-preview-tts',
-                contents=f"{voice_instruction} {full_narration}",
-                config=types.GenerateContentConfig(
-                    response_modalities=["AUDIO"],
-                    speech_config=types.SpeechConfig(
-                        voice_config=types.VoiceConfig(
-                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                voice_name=selected_voice
-                            )
-                        )
-                    )
-                )
-            )
-            
-            # Save audio
-            for part in response.parts:
-                if part.inline_data:
-                    wave_file(audio_path, part.inline_data.data)
-                    audio_map[i] = audio_path  # Store single audio path per slide
-                    print(f"✓ Generated audio for slide {i}")
-                    break
+            print(f"Generating audio for slide {i} (Audience: {target_audience})...")
+            path = await _synthesize_clip(tts, full_narration, target_audience, i)
+            if path:
+                audio_map[i] = path
+                progress.record(i, cache_key, path)
+                start_segment(i)
                     
         except Exception as e:
             print(f"Failed audio for slide {i}: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(synthesize_slide(i, slide) for i, slide in enumerate(slides)))
+    stats = audio_cache.stats()
+    print(f"✓ Audio stage finished in {time.perf_counter() - started:.2f}s ({len(audio_map)}/{len(slides)} slides, "
+          f"cache hits {stats['hits']}, misses {stats['misses']})")
+
+    if segment_jobs:
+        # A failed segment is not fatal here: create_video encodes whatever is not cached
+        results = await asyncio.gather(*segment_jobs, return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            print(f"⚠ {len(errors)} segments failed to encode early, create_video will retry: {errors[0]}")
+
+    missing = [i for i in range(len(slides)) if i not in audio_map]
+    if missing:
+        # Fail the node rather than render a video with silent gaps; finished slides
+        # are recorded, so resuming the job only synthesizes these
+        raise RuntimeError(f"Audio generation failed for slides {missing} after retries")
     
     return {"audio_map": audio_map}
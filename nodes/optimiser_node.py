@@ -3,89 +3,210 @@ Optimiser node for improving script based on feedback.
 """
 import os
 import json
+import copy
+import asyncio
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 from models.state import AgentState
+from nodes.script_node import SCRIPT_SCHEMA, normalise_slide
+from utils.stage_limits import limit_stage
+from utils.genai_client import get_client
+from utils.progress import report_progress
+from utils.rate_limit import retry_on_rate_limit
+from utils.llm_cache import get_llm_cache
 
 load_dotenv()
 # 1. Is the assignment fulfilling the learning objectives?
 # 2. Is the script LO compliant?
 # 3. Are sentences short and simple (Indian English)?
 
-def optimise_script(state: AgentState):
-    """Optimises the script based on evaluation feedback."""
-    print("Optimising script based on feedback...")
-    json_script = state.get('json_script')
-    feedback = state.get('evaluation_feedback', '')
-    
-    if not json_script:
-        return {"json_script": {}}
+OPTIMISER_MODEL = 'gemini-2.5-flash'  # Use Flash for faster optimization
+SLIDE_SCHEMA = SCRIPT_SCHEMA["properties"]["slides"]["items"]
+
+# Parallel per-slide rewrites, kept under the model's RPM
+OPTIMISER_MAX_CONCURRENCY = int(os.getenv("OPTIMISER_MAX_CONCURRENCY", "4"))
+
+# Above this share of flagged slides a single whole-script call is cheaper
+PATCH_MAX_FRACTION = float(os.getenv("OPTIMISER_PATCH_MAX_FRACTION", "0.6"))
+
+
+def _usage(response):
+    """Token counts from a response's usage metadata (zeros if the SDK omits it)."""
+    usage = getattr(response, 'usage_metadata', None)
+    return {
+        "prompt_tokens": getattr(usage, 'prompt_token_count', None) or 0,
+        "output_tokens": getattr(usage, 'candidates_token_count', None) or 0,
+        "total_tokens": getattr(usage, 'total_token_count', None) or 0,
+    }
+
+
+def _add_usage(total, usage):
+    for key, value in usage.items():
+        total[key] = total.get(key, 0) + value
+
+
+def _issues_by_slide(violations, num_slides):
+    """
+    Groups violations by 0-based slide index. Returns None if any of them is
+    not tied to a valid slide, since those need the whole script rewritten.
+    """
+    issues = {}
+    for violation in violations:
+        slide = violation.get('slide', 0)
+        if not isinstance(slide, int) or not 1 <= slide <= num_slides:
+            return None
+        issues.setdefault(slide - 1, []).append(violation['message'])
+    return issues
+
+
+async def _rewrite_slide(client, semaphore, json_script, index, issues):
+    """Rewrites one slide to address its issues. Returns (index, slide or None, usage)."""
+    slides = json_script['slides']
+    neighbours = {
+        "previous_slide_title": slides[index - 1].get('title') if index > 0 else None,
+        "next_slide_title": slides[index + 1].get('title') if index + 1 < len(slides) else None,
+    }
+    prompt = f"""
+    You are an expert script editor for a Spoken Tutorial presentation titled
+    "{json_script.get('presentation_title', '')}".
+    Learning objectives: {json.dumps(json_script.get('learning_objectives', []))}
+    Context: {json.dumps(neighbours)}
+
+    Rewrite slide {index + 1} below so that it fixes EVERY issue listed.
+
+    === ISSUES ===
+    {chr(10).join(f"- {issue}" for issue in issues)}
+
+    === SLIDE {index + 1} ===
+    {json.dumps(slides[index], indent=2)}
+
+    === INSTRUCTIONS ===
+    1. Change only what is needed to fix the issues; keep the slide's role in the flow.
+    2. Keep exactly one narration line for the title plus one per content bullet.
+    3. Keep every narration sentence under 80 characters, with no arrows, dashes or symbols.
+    4. Keep the same JSON structure, including image_prompt, video_prompt and is_video_slide.
+
+    Return ONLY the updated slide object.
+    """
 
-    client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
-    
+    async with semaphore:
+        try:
+            response = await retry_on_rate_limit(lambda: get_llm_cache().agenerate(
+                client,
+                model=OPTIMISER_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    response_mime_type="application/json",
+                    response_schema=SLIDE_SCHEMA
+                ),
+                bypass=True
+            ))
+            return index, normalise_slide(json.loads(response.text)), _usage(response)
+        except Exception as e:
+            print(f"⚠ Rewrite of slide {index + 1} failed, keeping it unchanged: {e}")
+            return index, None, {}
+
+
+async def _patch_slides(client, json_script, issues):
+    """Rewrites the flagged slides in parallel and merges them into a copy of the script."""
+    semaphore = asyncio.Semaphore(OPTIMISER_MAX_CONCURRENCY)
+    results = await asyncio.gather(*[
+        _rewrite_slide(client, semaphore, json_script, index, slide_issues)
+        for index, slide_issues in sorted(issues.items())
+    ])
+
+    patched = copy.deepcopy(json_script)
+    usage = {}
+    rewritten = []
+    for index, slide, slide_usage in results:
+        _add_usage(usage, slide_usage)
+        if slide is not None:
+            patched['slides'][index] = slide
+            rewritten.append(index + 1)
+    return patched, rewritten, usage
+
+
+async def _rewrite_script(client, json_script, feedback):
+    """Rewrites the whole script; used when feedback is script-wide."""
     prompt = f"""
     You are an expert script editor.
-    
+
     Your task is to improve the following script based on the provided feedback.
-    
+
     === FEEDBACK ===
     {feedback}
-    
+
     === SCRIPT TO IMPROVE ===
     {json.dumps(json_script, indent=2)}
-    
+
     === INSTRUCTIONS ===
     1. Address ALL points in the feedback.
     2. Maintain the exact same JSON structure.
     3. Do not remove any slides unless explicitly asked.
     4. Ensure the output is valid JSON.
-    
+    5. Keep every narration sentence under 80 characters, with no arrows, dashes or symbols.
+
     Return the COMPLETE updated script.
     """
-    
+
+    response = await retry_on_rate_limit(lambda: get_llm_cache().agenerate(
+        client,
+        model=OPTIMISER_MODEL,
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=SCRIPT_SCHEMA
+        ),
+        bypass=True
+    ))
+    return json.loads(response.text), _usage(response)
+
+
+@limit_stage("llm")
+async def optimise_script(state: AgentState):
+    """
+    Optimises the script based on evaluation feedback.
+
+    When every issue is tied to a slide, only the flagged slides are
+    rewritten (concurrently) and patched back in, so the cost of a loop
+    scales with the number of failing slides rather than the deck size.
+    Script-wide feedback still gets a whole-script rewrite.
+    """
+    print("Optimising script based on feedback...")
+    json_script = state.get('json_script')
+    feedback = state.get('evaluation_feedback', '')
+    iteration = state.get('evaluation_iteration', 0)
+    report_progress("optimiser", iteration=iteration)
+
+    if not json_script:
+        return {"json_script": {}}
+
+    client = get_client()
+    slides = json_script.get('slides', [])
+    issues = _issues_by_slide(state.get('evaluation_violations') or [], len(slides))
+    # Rewrites always go to the model (they are still recorded for replay runs).
+    # A cached rewrite that did not fix the issues would come back unchanged,
+    # with the same cached failing verdict, on every iteration and every run.
+
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',  # Use Flash for faster optimization
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema={
-                    "type": "object",
-                    "properties": {
-                        "presentation_title": {"type": "string"},
-                        "module": {"type": "string"},
-                        "episode": {"type": "string"},
-                        "learning_objectives": {"type": "array", "items": {"type": "string"}},
-                        "duration": {"type": "string"},
-                        "outline": {"type": "array", "items": {"type": "string"}},
-                        "meta_tags": {"type": "array", "items": {"type": "string"}},
-                        "prerequisites": {"type": "string"},
-                        "slides": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "title": {"type": "string"},
-                                    "content": {"type": "array", "items": {"type": "string"}},
-                                    "narration": {"type": "array", "items": {"type": "string"}},
-                                    "image_prompt": {"type": "string"},
-                                    "video_prompt": {"type": "string"},
-                                    "is_video_slide": {"type": "boolean"}
-                                },
-                                "required": ["title", "content", "narration", "image_prompt"]
-                            }
-                        }
-                    },
-                    "required": ["slides", "module", "episode", "learning_objectives", "duration", "outline", "meta_tags", "prerequisites"]
-                }
-            )
-        )
-        
-        optimised_script = json.loads(response.text)
-        print("✓ Script optimised.")
-        return {"json_script": optimised_script}
-        
+        if issues and len(issues) <= PATCH_MAX_FRACTION * len(slides):
+            optimised_script, rewritten, usage = await _patch_slides(client, json_script, issues)
+            strategy = "patch"
+            print(f"✓ Rewrote {len(rewritten)}/{len(slides)} slides: {rewritten}")
+        else:
+            optimised_script, usage = await _rewrite_script(client, json_script, feedback)
+            rewritten = list(range(1, len(optimised_script.get('slides', [])) + 1))
+            strategy = "full"
+            print("✓ Script optimised.")
     except Exception as e:
         print(f"Optimisation failed: {e}")
         return {"json_script": json_script} # Return original on failure
+
+    report = {"iteration": iteration, "strategy": strategy, "slides_rewritten": rewritten, **usage}
+    print(f"Optimiser tokens (iteration {iteration}, {strategy}): "
+          f"{usage.get('prompt_tokens', 0)} in / {usage.get('output_tokens', 0)} out")
+    report_progress("optimiser", **report)
+    return {
+        "json_script": optimised_script,
+        "optimiser_usage": (state.get('optimiser_usage') or []) + [report]
+    }
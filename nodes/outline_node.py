@@ -3,10 +3,12 @@ Outline generation node for the slide generator agent.
 """
 import os
 from dotenv import load_dotenv
-from google import genai
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, InternalServerError
 from models.state import AgentState
+from utils.stage_limits import limit_stage
+from utils.genai_client import get_client
+from utils.llm_cache import get_llm_cache
 
 load_dotenv()
 
@@ -16,13 +18,16 @@ load_dotenv()
     wait=wait_exponential(multiplier=4, min=4, max=60),
     stop=stop_after_attempt(5)
 )
+@limit_stage("llm")
 def generate_outline(state: AgentState):
     """Generates a structured, educational presentation outline using meta-prompting."""
     print("Generating enhanced outline...")
     print(f"Generating outline for: {state.get('topic')}")
     topic = state.get('topic') or state.get('outline')
     
-    client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    client = get_client()
+    llm_cache = get_llm_cache()
+    bypass = bool(state.get('cache_bypass'))
     
     # Generate outline following user's example format
     meta_prompt = f"""Create a detailed, practical outline for a Spoken Tutorial on: "{topic}"
@@ -99,12 +104,14 @@ Generate a complete, detailed outline following this exact format."""
         print(f"Generating structured outline...")
         
         # Generate outline using Gemini 2.5 Flash (Pro was timing out)
-        response = client.models.generate_content(
+        response = llm_cache.generate(
+            client,
             model='gemini-2.5-flash',
             contents=meta_prompt,
             config={
                 'temperature': 0.7,
-            }
+            },
+            bypass=bypass
         )
         
         # Enhanced outline generation with formatting
@@ -125,7 +132,7 @@ Generate a complete, detailed outline following this exact format."""
         fallback_prompt = f"""Create a simple outline for a presentation on "{topic}". Include 6-8 main sections with brief descriptions."""
         
         try:
-            fallback_response = client.models.generate_content(model='gemini-2.5-flash', contents=fallback_prompt)
+            fallback_response = llm_cache.generate(client, model='gemini-2.5-flash', contents=fallback_prompt, bypass=bypass)
             return {"outline": fallback_response.text}
         except:
             return {"outline": "Failed to generate outline."}
@@ -3,28 +3,133 @@ Script generation node for the slide generator agent.
 Contains the main script generation logic with comprehensive prompts.
 """
 import os
+import copy
 import json
+import time
+import asyncio
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, InternalServerError
 from models.state import AgentState
+from utils.stage_limits import limit_stage
+from utils.genai_client import get_client
+from utils.json_stream import ArrayItemStream
+from utils.progress import report_progress
+from utils.llm_cache import get_llm_cache
+from nodes.media_node import should_prefetch, prefetch_slide
 
 load_dotenv()
 
+SCRIPT_MODEL = 'gemini-2.5-flash'  # Use Flash to avoid timeouts
+
+# Streamed generation hands each slide on as soon as its JSON object closes
+STREAM_SCRIPT = os.getenv("SCRIPT_STREAMING", "1") != "0"
+
+SCRIPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "presentation_title": {"type": "string"},
+        "module": {"type": "string"},
+        "episode": {"type": "string"},
+        "learning_objectives": {"type": "array", "items": {"type": "string"}},
+        "duration": {"type": "string"},
+        "outline": {"type": "array", "items": {"type": "string"}},
+        "meta_tags": {"type": "array", "items": {"type": "string"}},
+        "prerequisites": {"type": "string"},
+        "slides": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "content": {"type": "array", "items": {"type": "string"}},
+                    "narration": {"type": "array", "items": {"type": "string"}},
+                    "image_prompt": {"type": "string"},
+                    "video_prompt": {"type": "string"},
+                    "is_video_slide": {"type": "boolean"}
+                },
+                "required": ["title", "content", "narration", "image_prompt"]
+            }
+        }
+    },
+    "required": ["slides", "module", "episode", "learning_objectives", "duration", "outline", "meta_tags", "prerequisites"],
+    # Short metadata first, so the first slide is not held behind it when streaming
+    "propertyOrdering": ["presentation_title", "module", "episode", "learning_objectives", "duration",
+                         "outline", "meta_tags", "prerequisites", "slides"]
+}
+
+
+def normalise_slide(slide):
+    """Drops empty bullets and pads/trims narration to one line per bullet plus the title."""
+    raw_content = slide.get('content', [])
+    clean_content = [c for c in raw_content if isinstance(c, str) and c.strip()]
+    slide['content'] = clean_content
+    
+    # Ensure narration matches content + 1x
+    current_narration = slide.get('narration', [])
+    if isinstance(current_narration, str):
+        current_narration = ["Introduction."] + [current_narration] * len(clean_content)
+    
+    target_length = len(clean_content) + 1
+    if len(current_narration) < target_length:
+        diff = target_length - len(current_narration)
+        current_narration.extend([f"Point {k+1}." for k in range(diff)])
+    elif len(current_narration) > target_length:
+        current_narration = current_narration[:target_length]
+    
+    slide['narration'] = current_narration
+    return slide
+
+
+def _stream_script(client, prompt, config, bypass=False, on_slide=None):
+    """
+    Generates the script with streamed output. Each slide is normalised,
+    reported on the graph's progress stream and passed to `on_slide(index,
+    slide)` as soon as its object is complete; the full document is still
+    parsed at the end.
+    """
+    start = time.perf_counter()
+    slides = ArrayItemStream("slides")
+    chunks = []
+    completed = []
+    stream = get_llm_cache().generate_stream(client, model=SCRIPT_MODEL, contents=prompt, config=config, bypass=bypass)
+    for chunk in stream:
+        text = chunk.text or ""
+        chunks.append(text)
+        for slide in slides.feed(text):
+            completed.append(normalise_slide(slide))
+            elapsed = time.perf_counter() - start
+            if len(completed) == 1:
+                print(f"✓ First slide after {elapsed:.1f}s")
+            report_progress("script", index=len(completed), slide=slide, elapsed=round(elapsed, 2))
+            if on_slide:
+                on_slide(len(completed) - 1, slide)
+    
+    json_script = json.loads("".join(chunks))
+    json_script['slides'] = completed
+    print(f"✓ Script streamed: {len(completed)} slides in {time.perf_counter() - start:.1f}s")
+    return json_script
+
 @retry(
     retry=retry_if_exception_type((ResourceExhausted, ServiceUnavailable, InternalServerError)),
     wait=wait_exponential(multiplier=4, min=4, max=60),
     stop=stop_after_attempt(5)
 )
-def generate_script(state: AgentState):
-    """Generates a presentation script using Gemini 2.5 Flash."""
+@limit_stage("llm")
+async def generate_script(state: AgentState):
+    """
+    Generates a presentation script using Gemini 2.5 Flash.
+
+    In full_production each streamed slide's narration and image start
+    generating on the graph's loop straight away (see prefetch_slide), so
+    the media stages mostly find them done once the script is approved.
+    """
     print("Generating script...")
     outline = state.get('outline')
 
-    # Use raw Google GenAI client instead of LangChain to avoid hanging issues
-    client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    # Use raw Google GenAI client instead of LangChain to avoid hanging issues (shared, pooled)
+    client = get_client()
     
     # Read business requirements
 
@@ -225,66 +330,33 @@ Thank you for joining!"
     }}
     """
     
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=SCRIPT_SCHEMA
+    )
+    
     try:
-        # Use raw client with structured output
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',  # Use Flash to avoid timeouts
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema={
-                    "type": "object",
-                    "properties": {
-                        "presentation_title": {"type": "string"},
-                        "module": {"type": "string"},
-                        "episode": {"type": "string"},
-                        "learning_objectives": {"type": "array", "items": {"type": "string"}},
-                        "duration": {"type": "string"},
-                        "outline": {"type": "array", "items": {"type": "string"}},
-                        "meta_tags": {"type": "array", "items": {"type": "string"}},
-                        "prerequisites": {"type": "string"},
-                        "slides": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "title": {"type": "string"},
-                                    "content": {"type": "array", "items": {"type": "string"}},
-                                    "narration": {"type": "array", "items": {"type": "string"}},
-                                    "image_prompt": {"type": "string"},
-                                    "video_prompt": {"type": "string"},
-                                    "is_video_slide": {"type": "boolean"}
-                                },
-                                "required": ["title", "content", "narration", "image_prompt"]
-                            }
-                        }
-                    },
-                    "required": ["slides", "module", "episode", "learning_objectives", "duration", "outline", "meta_tags", "prerequisites"]
-                }
+        if STREAM_SCRIPT:
+            on_slide = None
+            if should_prefetch(state):
+                loop = asyncio.get_running_loop()
+                # Slides arrive on the streaming thread; the media requests run on the graph's loop
+                on_slide = lambda i, slide: loop.call_soon_threadsafe(prefetch_slide, state, i, copy.deepcopy(slide))
+            json_script = await asyncio.to_thread(
+                _stream_script, client, prompt, config, bypass=bool(state.get('cache_bypass')), on_slide=on_slide
             )
-        )
-        json_script = json.loads(response.text)
-        
-        # Post-processing (same as before)
-        for slide in json_script.get('slides', []):
-            # Ensure content is clean
-            raw_content = slide.get('content', [])
-            clean_content = [c for c in raw_content if isinstance(c, str) and c.strip()]
-            slide['content'] = clean_content
-            
-            # Ensure narration matches content + 1x
-            current_narration = slide.get('narration', [])
-            if isinstance(current_narration, str):
-                current_narration = ["Introduction."] + [current_narration] * len(clean_content)
-            
-            target_length = len(clean_content) + 1
-            if len(current_narration) < target_length:
-                diff = target_length - len(current_narration)
-                current_narration.extend([f"Point {k+1}." for k in range(diff)])
-            elif len(current_narration) > target_length:
-                current_narration = current_narration[:target_length]
-            
-            slide['narration'] = current_narration
+        else:
+            response = await asyncio.to_thread(
+                get_llm_cache().generate,
+                client,
+                model=SCRIPT_MODEL,
+                contents=prompt,
+                config=config,
+                bypass=bool(state.get('cache_bypass'))
+            )
+            json_script = json.loads(response.text)
+            for slide in json_script.get('slides', []):
+                normalise_slide(slide)
             
         return {"json_script": json_script}
     except Exception as e:
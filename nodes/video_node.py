@@ -2,135 +2,140 @@
 Video creation node.
 """
 import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import fitz
-from moviepy import ImageClip, AudioFileClip, concatenate_videoclips, VideoFileClip, CompositeVideoClip, vfx
 from models.state import AgentState
+from utils.stage_limits import stage_slot
+from utils.audio_utils import wav_duration, build_narration
+from utils.ffmpeg_utils import write_concat_list, encode_stills, fit_page, concat_segments
+from utils.narration_timing import page_durations
+from utils.segment_encoder import segment_renderer, slide_page_ranges, SEGMENT_WORKERS
+from utils.rasterise import rasterise_pages
+from utils.workspace import workspace_dir, workspace_path
+from utils.progress import report_progress
 
 def create_video(state: AgentState):
+    """
+    Renders the slides PDF and narration into an MP4.
+
+    Pages are rasterised in parallel at the output resolution, then fed to
+    ffmpeg through a concat demuxer list (image + duration per page) and
+    muxed with the concatenated narration, so frames are never decoded in
+    Python. Each page is timed to its own narration line, using the pauses
+    in the slide's audio. Pages whose slide has a Veo background are
+    composited by ffmpeg's overlay filter in the same pass.
+
+    With VIDEO_RENDER_MODE=segments each slide is instead encoded into its own
+    cached segment (most of them already started by the audio stage) and the
+    segments are joined without re-encoding.
+    """
     print("Creating video...")
-    pdf_path = state['pdf_path']
-    audio_map = state['audio_map']
-    
-    if not pdf_path or not audio_map: return {"video_path": None}
-        
-    doc = fitz.open(pdf_path)
-    clips = []
-    current_page_index = 0
+    # In full production this runs after the compile_pdf join even when the
+    # LaTeX build failed, in which case there is an error and no PDF
+    if state.get('error'):
+        print(f"⚠ Not rendering video: {state['error']}")
+        return {"video_path": None}
+    pdf_path = state.get('pdf_path')
+    audio_map = state.get('audio_map')
+    if not pdf_path:
+        return {"video_path": None, "error": "No slides PDF to render the video from"}
+
+    if not audio_map: return {"video_path": None}
+
+    with fitz.open(pdf_path) as doc:
+        num_pdf_pages = len(doc)
+        page_width, page_height = doc.load_page(0).rect.width, doc.load_page(0).rect.height
     slides = state['json_script']['slides']
-    
-    for i, slide in enumerate(slides):
-        audio_path = audio_map.get(i)  # Now returns a single path string, not a list
-        if not audio_path:
-            print(f"No audio for slide {i}, skipping...")
-            continue
-        
-        # Validate that the audio file actually exists
-        if not os.path.exists(audio_path):
-            print(f"Audio file not found for slide {i}: {audio_path}, skipping...")
-            continue
-        
-        # Count how many pages this slide has (title + bullets)
-        content_items = slide.get('content', [])
-        num_pages_for_slide = len(content_items) + 1  # +1 for title-only page
-        
-        # Load the audio clip to get total duration
-        try:
-            audio_clip = AudioFileClip(audio_path)
-            if audio_clip is None or audio_clip.reader is None:
-                print(f"Failed to load audio for slide {i}: Invalid audio file")
+    work_dir = tempfile.mkdtemp(prefix="render_", dir=workspace_dir(state))
+
+    plans = []  # (slide index, slide, audio_path, duration, page indices)
+    page_ranges = slide_page_ranges(slides, num_pdf_pages)
+
+    try:
+        for i, slide in enumerate(slides):
+            # Title page plus one page per content item
+            num_pages_for_slide = len(slide.get('content', [])) + 1
+            page_indices = page_ranges[i]
+
+            audio_path = audio_map.get(i)
+            if not audio_path:
+                print(f"No audio for slide {i}, skipping...")
                 continue
-            total_audio_duration = audio_clip.duration
-        except Exception as e:
-            print(f"Error loading audio for slide {i}: {e}")
-            continue
-        
-        # Calculate duration per page to distribute audio evenly
-        duration_per_page = total_audio_duration / num_pages_for_slide
-        
-        print(f"Slide {i}: {num_pages_for_slide} pages, {total_audio_duration:.2f}s audio, {duration_per_page:.2f}s per page")
-        
-        # Create video clips for each page of this slide
-        # Prepare master video background if applicable
-        master_video_bg = None
-        if slide.get('is_video_slide') and slide.get('image_path') and slide['image_path'].endswith('.mp4'):
-            try:
-                # Load the video file
-                raw_video = VideoFileClip(slide['image_path'])
-                # Loop it to cover the total audio duration of the slide
-                # We use a large number of loops or duration to ensure coverage
-                master_video_bg = raw_video.with_effects([vfx.Loop(duration=total_audio_duration)])
-                print(f"Loaded video background for slide {i}")
-            except Exception as e:
-                print(f"Failed to load video background for slide {i}: {e}")
-
-        for page_offset in range(num_pages_for_slide):
-            page_index = current_page_index + page_offset
-            if page_index >= len(doc):
-                print(f"Warning: Page index {page_index} out of bounds")
-                break
-            
-            page = doc.load_page(page_index)
-            pix = page.get_pixmap(dpi=300)
-            img_path = f"temp_slide_{i}_page_{page_offset}.png"
-            pix.save(img_path)
-            
-            # Extract the segment of audio for this page
-            start_time = page_offset * duration_per_page
-            end_time = (page_offset + 1) * duration_per_page
-            
+
+            # Validate that the audio file actually exists
+            if not os.path.exists(audio_path):
+                print(f"Audio file not found for slide {i}: {audio_path}, skipping...")
+                continue
+
             try:
-                audio_segment = audio_clip.subclipped(start_time, end_time)
-                
-                # Base clip from PDF page
-                base_clip = ImageClip(img_path).with_duration(duration_per_page)
-                
-                # Composite video background if available
-                if master_video_bg:
-                    try:
-                        # Extract segment from the looped master video
-                        video_segment = master_video_bg.subclipped(start_time, end_time)
-                        
-                        # Resize and position
-                        # We assume the layout puts the image on the right half (50% width)
-                        # We'll resize the video to fit half the width of the PDF page
-                        # pix.width is the full width
-                        target_width = pix.width / 2
-                        
-                        # Resize video (keeping aspect ratio? or fill?)
-                        # Let's resize to target width
-                        video_segment = video_segment.resized(width=target_width)
-                        
-                        # Position on the right
-                        video_segment = video_segment.with_position(("right", "center"))
-                        
-                        # Composite: Base PDF (bottom) + Video (top, right)
-                        # Note: PDF page has white background on right, so video covers it.
-                        video_clip = CompositeVideoClip([base_clip, video_segment])
-                        video_clip = video_clip.with_duration(duration_per_page)
-                        
-                    except Exception as e:
-                        print(f"Failed to composite video for slide {i} page {page_offset}: {e}")
-                        video_clip = base_clip # Fallback
-                else:
-                    video_clip = base_clip
-
-                video_clip = video_clip.with_audio(audio_segment)
-                clips.append(video_clip)
+                total_audio_duration = wav_duration(audio_path)
             except Exception as e:
-                print(f"Error creating video clip for slide {i}, page {page_offset}: {e}")
-                # Create clip without audio as fallback
-                video_clip = ImageClip(img_path).with_duration(duration_per_page)
-                clips.append(video_clip)
-        
-        current_page_index += num_pages_for_slide
-        # Don't close audio_clip here - the subclipped segments still need it!
-        # The clips will be cleaned up automatically after video writing
-            
-    final_video = concatenate_videoclips(clips)
-    video_path = "presentation.mp4"
-    final_video.write_videofile(video_path, fps=24, codec='libx264', audio_codec='aac')
-    
-    # Cleanup
-    for f in glob.glob("temp_slide_*.png"): os.remove(f)
-    
-    return {"video_path": os.path.abspath(video_path)}
+                print(f"Error loading audio for slide {i}: {e}")
+                continue
+
+            if len(page_indices) < num_pages_for_slide:
+                print(f"Warning: slide {i} is missing {num_pages_for_slide - len(page_indices)} pages in the PDF")
+            if page_indices:
+                plans.append((i, slide, audio_path, total_audio_duration, page_indices))
+
+        if not plans:
+            return {"video_path": None}
+
+        renderer = segment_renderer(state)
+        if renderer:
+            return {"video_path": _render_segments(state, renderer, plans)}
+
+        # Render every needed page in parallel, directly at the output resolution
+        page_images = rasterise_pages(pdf_path, [p for plan in plans for p in plan[4]], work_dir)
+
+        page_entries = []  # (image_path, duration) in playback order
+        audio_paths = []
+        overlays = []  # (video_path, start, end) on the output timeline
+        timeline = 0.0
+        for i, slide, audio_path, total_audio_duration, page_indices in plans:
+            # Each page stays up while its narration line is spoken
+            durations = page_durations(audio_path, slide.get('narration', []), len(page_indices), total_audio_duration)
+            print(f"Slide {i}: {len(page_indices)} pages, {total_audio_duration:.2f}s audio, "
+                  f"pages {', '.join(f'{d:.2f}s' for d in durations)}")
+
+            if slide.get('is_video_slide') and (slide.get('image_path') or '').endswith('.mp4') and os.path.exists(slide['image_path']):
+                overlays.append((slide['image_path'], timeline, timeline + total_audio_duration))
+                print(f"Loaded video background for slide {i}")
+
+            page_entries.extend((page_images[p], d) for p, d in zip(page_indices, durations))
+            audio_paths.append(audio_path)
+            timeline += total_audio_duration
+
+        list_path = write_concat_list(page_entries, os.path.join(work_dir, "pages.txt"))
+        narration_path = build_narration(audio_paths, os.path.join(work_dir, "narration.wav"))
+
+        video_path = workspace_path(state, "presentation.mp4")
+        # The ffmpeg slot is taken around ffmpeg itself, not the whole node:
+        # segments mode takes one per segment encode (see SegmentRenderer.encode)
+        with stage_slot("ffmpeg"):
+            encode_stills(list_path, narration_path, video_path, duration=timeline,
+                          overlays=overlays, page_box=fit_page(page_width, page_height),
+                          on_progress=lambda percent: report_progress("encode", percent=percent))
+    finally:
+        # Cleanup
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {"video_path": video_path}
+
+
+def _render_segments(state, renderer, plans):
+    """Encodes (or reuses) one segment per slide, then joins them into the final MP4."""
+    with ThreadPoolExecutor(max_workers=SEGMENT_WORKERS) as pool:
+        futures = {pool.submit(renderer.encode, i, audio_path): i for i, _, audio_path, _, _ in plans}
+        # Progress is reported from this thread: the graph's stream writer is not visible in pool threads
+        for done, future in enumerate(as_completed(futures), start=1):
+            report_progress("encode", percent=int(done / len(plans) * 100), slide=futures[future] + 1)
+        segments = [path for path in (future.result() for future in futures) if path]
+
+    video_path = workspace_path(state, "presentation.mp4")
+    with stage_slot("ffmpeg"):
+        concat_segments(segments, video_path)
+    print(f"✓ Joined {len(segments)} slide segments")
+    return video_path
@@ -10,15 +10,23 @@ def route_evaluation(state: AgentState):
     iteration = state.get('evaluation_iteration', 0)
     max_iterations = 5
     
-    if passed:
-        return "proceed"
-    elif iteration >= max_iterations:
-        print(f"⚠ Max evaluation iterations ({max_iterations}) reached.")
+    if passed or iteration >= max_iterations:
+        if not passed:
+            print(f"⚠ Max evaluation iterations ({max_iterations}) reached.")
+        if state.get("mode") == "full_production":
+            # Parallel branches: review PDF, images -> LaTeX -> PDF, and audio
+            return ["proceed", "images", "audio"]
         return "proceed"
     else:
         print(f"↺ Optimising script (Iteration {iteration})...")
         return "optimise"
 
+def route_audio(state: AgentState):
+    """After audio: render straight away, or wait for the slides PDF branch to join."""
+    if state.get("mode") == "full_production":
+        return "join"
+    return "video"
+
 def route_step(state: AgentState):
     mode = state.get("mode", "script_only")
     
@@ -33,6 +41,7 @@ def route_step(state: AgentState):
     elif mode == "outline_only":
         return "outline"
         
+    # full_production also starts from the script and fans out after evaluation
     if state.get("outline"):
         return "script"
         
@@ -1,13 +1,21 @@
 from fastapi import FastAPI, HTTPException, File, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Union, Optional
 import os
 import json
-from agent import graph
+from agent import graph, build_graph
 from outline_generator import create_outline_docx, parse_docx_outline
+from utils.asset_cache import cache_stats
+from utils.llm_cache import get_llm_cache
+from utils.tts_backends import get_tts_backend
+from utils.image_backends import local_image_backend
+from utils.workspace import WORKSPACE_ROOT, create_workspace, cleanup_workspace, prune_workspaces, artifact_url
+from jobs.queue import JobQueue
+from jobs.store import FINISHED_STATES
+from jobs.checkpoints import open_checkpointer, close_checkpointer, thread_config, forget_thread, resume_point
 
 app = FastAPI(title="Slide Generator API")
 
@@ -22,6 +30,34 @@ app.add_middleware(
 # Mount static files to serve generated content
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Every graph run renders into its own workspace under WORKSPACE_ROOT
+os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+app.mount("/workspaces", StaticFiles(directory=WORKSPACE_ROOT), name="workspaces")
+
+# Long-running generation runs as background jobs persisted in SQLite
+job_queue = JobQueue()
+
+# Job graph runs are checkpointed after every node so failures can resume
+checkpointer = None
+job_graph = graph
+
+@app.on_event("startup")
+async def startup():
+    global checkpointer, job_graph
+    removed = prune_workspaces()
+    if removed:
+        print(f"Pruned {removed} expired workspaces")
+    checkpointer = await open_checkpointer()
+    job_graph = build_graph(checkpointer)
+    # Jobs interrupted by a restart are re-queued here and resume from their checkpoints
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_queue.stop()
+    if checkpointer is not None:
+        await close_checkpointer(checkpointer)
+
 class SlideContentItem(BaseModel):
     type: str
     items: Optional[List[str]] = None
@@ -32,23 +68,48 @@ class Slide(BaseModel):
     title: str
     content: List[Union[str, dict]]
 
+def _known_tts_backend(name):
+    # Unknown names are rejected with a 422 here rather than failing the queued job
+    if name:
+        get_tts_backend(name)
+    return name
+
+def _known_image_backend(name):
+    local_image_backend(name)  # raises ValueError for unknown names
+    return name
+
 class GenerateScriptRequest(BaseModel):
     topic: Optional[str] = None  # Either topic OR outline must be provided
     outline: Optional[str] = None  # Pre-generated outline
     title: Optional[str] = None
     target_audience: Optional[str] = None
     mode: Optional[str] = "script_only"
+    cache_bypass: Optional[bool] = False  # Force fresh LLM responses instead of cached ones
+    tts_backend: Optional[str] = None  # "gemini", "edge", "gtts" or "stub"; defaults to TTS_BACKEND
+    image_backend: Optional[str] = None  # "gemini", "draft" or "stub"; defaults to IMAGE_BACKEND
+
+    _check_tts_backend = field_validator("tts_backend")(_known_tts_backend)
+    _check_image_backend = field_validator("image_backend")(_known_image_backend)
 
 class GenerateOutlineRequest(BaseModel):
     topic: str
     target_audience: Optional[str] = None
+    cache_bypass: Optional[bool] = False
 
 class GenerateVideoRequest(BaseModel):
     json_script: dict
-    pdf_path: Optional[str] = None
+    pdf_path: str  # the slides job's result pdf_path
+    target_audience: Optional[str] = None
+    tts_backend: Optional[str] = None
+
+    _check_tts_backend = field_validator("tts_backend")(_known_tts_backend)
 
 class GenerateSlidesRequest(BaseModel):
     json_script: dict
+    target_audience: Optional[str] = None
+    image_backend: Optional[str] = None  # "draft" renders instant title cards for layout review
+
+    _check_image_backend = field_validator("image_backend")(_known_image_backend)
 
 @app.post("/generate_outline")
 async def generate_outline(request: GenerateOutlineRequest):
@@ -56,7 +117,8 @@ async def generate_outline(request: GenerateOutlineRequest):
         # Run the agent to generate outline
         inputs = {
             "topic": request.topic,
-            "mode": "outline_only"
+            "mode": "outline_only",
+            "cache_bypass": request.cache_bypass
         }
         
         result = await graph.ainvoke(inputs)
@@ -116,137 +178,285 @@ async def upload_outline(file: UploadFile = File(...)):
         print(f"ERROR in upload_outline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/generate_script")
-async def generate_script(request: GenerateScriptRequest):
-    """Generates a presentation script. If topic is provided, generates outline first."""
+async def run_graph(job_id, state, step="main"):
+    """
+    Runs the graph for a job like graph.ainvoke(), publishing node
+    transitions and the nodes' own progress events to the job's subscribers.
+
+    Each node's output is checkpointed under the job's thread. If an earlier
+    attempt of this run failed part-way, it resumes at the failed node and
+    `state` is ignored (rewinding further if cached assets it produced were
+    evicted since); completed runs drop their checkpoints.
+    """
+    config = thread_config(job_id, step)
+    final_state = state
+    if checkpointer is not None:
+        resume = await resume_point(job_graph, config)
+        if resume:
+            snapshot, config = resume
+            print(f"↻ Resuming job {job_id} ({step}) at {', '.join(snapshot.next)}")
+            await job_queue.publish(job_id, {"type": "resume", "nodes": list(snapshot.next)})
+            final_state, state = snapshot.values, None
+
+    async for mode, chunk in job_graph.astream(state, config, stream_mode=["values", "tasks", "custom"]):
+        if mode == "values":
+            final_state = chunk
+        elif mode == "tasks":
+            node = chunk["name"]
+            if "input" in chunk:
+                job_queue.set_stage(job_id, node)
+                event = {"type": "node", "node": node, "status": "started"}
+            else:
+                event = {"type": "node", "node": node, "status": "failed" if chunk.get("error") else "completed"}
+            await job_queue.publish(job_id, event)
+        elif mode == "custom":
+            await job_queue.publish(job_id, {"type": "progress", **chunk})
+
+    if checkpointer is not None:
+        await forget_thread(checkpointer, job_id, step)
+    return final_state
+
+def _job_failure(result, message):
+    """The error a handler raises when its artifact is missing, with the graph's reason if it gave one."""
+    reason = (result.get("error") or "").strip()
+    if len(reason) > 2000:
+        reason = "…" + reason[-2000:]  # pdflatex logs end with the error
+    return RuntimeError(f"{message}: {reason}" if reason else message)
+
+def _queued_response(job):
+    return JSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    })
+
+@job_queue.handler("script")
+async def run_script_job(job_id, payload):
+    """
+    Generates a presentation script. If only a topic is given, generates the outline first.
+    With mode "full_production" the approved script also goes on to slides and video.
+    """
+    request = GenerateScriptRequest(**payload)
     
-    # Validate that either topic or outline is provided
-    if not request.topic and not request.outline:
-        raise HTTPException(status_code=400, detail="Either 'topic' or 'outline' must be provided")
+    # STEP 1: Generate outline if only topic is provided
+    outline_text = request.outline
     
-    print(f"Received request to generate script. Topic: {request.topic}, Has outline: {bool(request.outline)}")
-
-    try:
-        # STEP 1: Generate outline if only topic is provided
-        outline_text = request.outline
-        
-        if not outline_text and request.topic:
-            print(f"🔍 Step 1: Generating outline for topic: {request.topic}")
-            outline_state = {
-                "topic": request.topic,
-                "mode": "outline_only"
-            }
-            
-            outline_result = await graph.ainvoke(outline_state)
-            outline_text = outline_result.get("outline", "")
-            
-            if not outline_text:
-                raise HTTPException(status_code=500, detail="Failed to generate outline")
-            
-            print(f"✓ Outline generated successfully ({len(outline_text)} chars)")
-        
-        # STEP 2: Generate script from outline
-        print(f"📝 Step 2: Generating script from outline...")
-        
-        initial_state = {
-            "outline": outline_text,
-            "mode": getattr(request, 'mode', 'script_only'),
-            "target_audience": request.target_audience,
-            "evaluation_iteration": 0,
-            "evaluation_passed": False,
-            "evaluation_feedback": None
+    if not outline_text and request.topic:
+        print(f"🔍 Step 1: Generating outline for topic: {request.topic}")
+        job_queue.set_stage(job_id, "outline")
+        outline_state = {
+            "topic": request.topic,
+            "mode": "outline_only",
+            "cache_bypass": request.cache_bypass
         }
         
-        result = await graph.ainvoke(initial_state)
+        outline_result = await run_graph(job_id, outline_state, step="outline")
+        outline_text = outline_result.get("outline", "")
         
-        script_pdf_path = result.get("script_pdf_path")
-        json_script = result.get("json_script")
+        if not outline_text:
+            raise RuntimeError("Failed to generate outline")
         
-        if script_pdf_path:
-            # Generate simple project ID
-            import time
-            project_id = int(time.time())
-            
-            # Save JSON script
-            json_path = f"script_{project_id}.json"
-            with open(json_path, 'w') as f:
-                json.dump(json_script, f, indent=2)
-            
-            print(f"✅ Saved script PDF and JSON for project #{project_id}")
-            
-            return JSONResponse({
-                "script_pdf_url": f"/static/{os.path.basename(script_pdf_path)}",
-                "json_script": json_script,
-                "outline": outline_text
-            })
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate script PDF")
-            
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR in generate_script: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        print(f"✓ Outline generated successfully ({len(outline_text)} chars)")
+    
+    # STEP 2: Generate script from outline
+    print(f"📝 Step 2: Generating script from outline...")
+    job_queue.set_stage(job_id, "script")
+    
+    # Generate simple project ID
+    import time
+    project_id = int(time.time())
+    _, workspace = create_workspace(job_id)
+    
+    initial_state = {
+        "project_id": project_id,
+        "job_id": job_id,
+        "workspace_dir": workspace,
+        "outline": outline_text,
+        "mode": request.mode or 'script_only',
+        "target_audience": request.target_audience,
+        "tts_backend": request.tts_backend,
+        "image_backend": request.image_backend,
+        "cache_bypass": request.cache_bypass,
+        "evaluation_iteration": 0,
+        "evaluation_passed": False,
+        "evaluation_feedback": None
+    }
+    
+    result = await run_graph(job_id, initial_state)
+    
+    script_pdf_path = result.get("script_pdf_path")
+    json_script = result.get("json_script")
+    
+    if not script_pdf_path:
+        raise RuntimeError("Failed to generate script PDF")
+    
+    # Save JSON script
+    json_path = os.path.join(workspace, f"script_{project_id}.json")
+    with open(json_path, 'w') as f:
+        json.dump(json_script, f, indent=2)
+    
+    print(f"✅ Saved script PDF and JSON for project #{project_id}")
+    response = {
+        "script_pdf_url": artifact_url(script_pdf_path),
+        "json_script": json_script,
+        "outline": outline_text
+    }
+    keep = [script_pdf_path, json_path]
+    
+    # full_production also renders the slides and video in the same run
+    if initial_state["mode"] == "full_production":
+        pdf_path = result.get("pdf_path")
+        video_path = result.get("video_path")
+        if not video_path or not os.path.exists(video_path):
+            raise _job_failure(result, "Failed to generate video")
+        response.update({
+            "slides_pdf_url": f"http://127.0.0.1:8000{artifact_url(pdf_path)}",
+            "pdf_path": pdf_path,
+            "video_url": f"http://127.0.0.1:8000{artifact_url(video_path)}"
+        })
+        keep += [pdf_path, video_path]
+    
+    cleanup_workspace(workspace, keep=keep)
+    return response
 
-@app.post("/generate_slides")
-async def generate_slides(request: GenerateSlidesRequest):
+@job_queue.handler("slides")
+async def run_slides_job(job_id, payload):
     """Generates PDF slides from the approved JSON script."""
-    print(f"Received request to generate slides")
+    request = GenerateSlidesRequest(**payload)
+    job_queue.set_stage(job_id, "slides")
+    
+    _, workspace = create_workspace(job_id)
+    initial_state = {
+        "job_id": job_id,
+        "workspace_dir": workspace,
+        "json_script": request.json_script, 
+        "mode": "slides_only",
+        "target_audience": request.target_audience,
+        "image_backend": request.image_backend
+    }
+    
+    result = await run_graph(job_id, initial_state)
+    
+    pdf_path = result.get("pdf_path")
+    if not pdf_path or not os.path.exists(pdf_path):
+        raise _job_failure(result, "Failed to generate PDF slides")
+    
+    print(f"✅ Generated slides PDF")
+    cleanup_workspace(workspace, keep=[pdf_path])
+    
+    return {
+        "slides_pdf_url": f"http://127.0.0.1:8000{artifact_url(pdf_path)}",
+        "pdf_path": pdf_path,
+        "json_script": request.json_script
+    }
 
+@job_queue.handler("video")
+async def run_video_job(job_id, payload):
+    """Generates the final video from the approved JSON script and existing PDF."""
+    request = GenerateVideoRequest(**payload)
+    job_queue.set_stage(job_id, "video")
+    
+    # Pass pdf_path to the state
+    _, workspace = create_workspace(job_id)
     initial_state = {
+        "job_id": job_id,
+        "workspace_dir": workspace,
         "json_script": request.json_script, 
-        "mode": "slides_only"
+        "mode": "video_production",
+        "pdf_path": request.pdf_path,
+        "target_audience": request.target_audience,
+        "tts_backend": request.tts_backend
     }
+    result = await run_graph(job_id, initial_state)
     
-    try:
-        result = await graph.ainvoke(initial_state)
-        
-        pdf_path = result.get("pdf_path")
-        if pdf_path and os.path.exists(pdf_path):
-            print(f"✅ Generated slides PDF")
-            
-            return JSONResponse({
-                "slides_pdf_url": f"http://127.0.0.1:8000/static/{os.path.basename(pdf_path)}",
-                "pdf_path": pdf_path,
-                "json_script": request.json_script
-            })
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate PDF slides")
-            
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR in generate_slides: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    video_path = result.get("video_path")
+    if not video_path or not os.path.exists(video_path):
+        raise _job_failure(result, "Failed to generate video")
+    
+    video_filename = os.path.basename(video_path)
+    print(f"✅ Generated video: {video_filename}")
+    cleanup_workspace(workspace, keep=[video_path])
+    
+    return {
+        "video_url": f"http://127.0.0.1:8000{artifact_url(video_path)}"
+    }
+
+@app.post("/generate_script")
+async def generate_script(request: GenerateScriptRequest):
+    """Queues script generation. Poll GET /jobs/{job_id} for the result."""
+    
+    # Validate that either topic or outline is provided
+    if not request.topic and not request.outline:
+        raise HTTPException(status_code=400, detail="Either 'topic' or 'outline' must be provided")
+    
+    print(f"Received request to generate script. Topic: {request.topic}, Has outline: {bool(request.outline)}")
+    return _queued_response(job_queue.submit("script", request.model_dump()))
+
+@app.post("/generate_slides")
+async def generate_slides(request: GenerateSlidesRequest):
+    """Queues slide generation. Poll GET /jobs/{job_id} for the result."""
+    print(f"Received request to generate slides")
+    return _queued_response(job_queue.submit("slides", request.model_dump()))
 
 @app.post("/generate_video")
 async def generate_video(request: GenerateVideoRequest):
-    """Generates the final video from the approved JSON script and existing PDF."""
-    try:
-        # Pass pdf_path to the state
-        initial_state = {
-            "json_script": request.json_script, 
-            "mode": "video_production",
-            "pdf_path": request.pdf_path or "output.pdf"
-        }
-        result = await graph.ainvoke(initial_state)
-        
-        video_path = result.get("video_path")
-        
-        if video_path and os.path.exists(video_path):
-            video_filename = os.path.basename(video_path)
-            print(f"✅ Generated video: {video_filename}")
-            
-            return JSONResponse({
-                "video_url": f"http://127.0.0.1:8000/static/{video_filename}"
-            })
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate video")
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR in generate_video: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    """Queues video generation. Poll GET /jobs/{job_id} for the result."""
+    if not os.path.isfile(request.pdf_path):
+        raise HTTPException(status_code=422, detail=f"Slides PDF not found: {request.pdf_path}; generate the slides first")
+    return _queued_response(job_queue.submit("video", request.model_dump()))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Returns the job's state, current stage and, once finished, its result and artifact URLs."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    status = job.to_dict()
+    result = status.get("result") or {}
+    status["artifacts"] = {key: value for key, value in result.items() if key.endswith("_url")}
+    return status
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-Sent Events: node transitions, per-slide progress and encode percentage."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job.status in FINISHED_STATES and not job_queue.events.has_history(job_id):
+        # Finished before this process started, so only the outcome is known
+        final = job.to_dict()
+        event = {"type": "status", "status": final["status"], "result": final["result"], "error": final["error"]}
+        async def replay():
+            yield f"data: {json.dumps(event)}\n\n"
+        return StreamingResponse(replay(), media_type="text/event-stream")
+
+    return StreamingResponse(
+        job_queue.events.subscribe(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    """Re-runs a failed or cancelled job from its last checkpoint, redoing only the failed node onwards."""
+    job = job_queue.resume(job_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Only failed or cancelled jobs can be resumed")
+    return _queued_response(job)
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    if not await job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job is not queued or running")
+    return {"job_id": job_id, "status": "cancelled"}
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the generated-asset caches and the LLM response cache."""
+    return {**cache_stats(), "llm": get_llm_cache().stats()}
 
 @app.get("/download/outline/{filename}")
 async def download_outline(filename: str):
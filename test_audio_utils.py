@@ -0,0 +1,86 @@
+"""
+Tests for the narration clip processing in utils/audio_utils.py.
+"""
+import numpy as np
+import pytest
+from utils.audio_utils import (
+    NARRATION_RATE, TARGET_DBFS, build_narration, fade_edges, frame_rms, normalise_loudness,
+    pcm_to_samples, read_wav, resample, samples_to_pcm, trim_silence, wav_duration, wave_file,
+    write_narration_clip,
+)
+
+
+def tone(seconds, rate=NARRATION_RATE, amplitude=0.3):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def dbfs(samples):
+    return 20 * np.log10(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+
+
+def test_pcm_round_trip_and_stereo_downmix():
+    samples = tone(0.1)
+    assert np.allclose(pcm_to_samples(samples_to_pcm(samples)), samples, atol=1e-4)
+    stereo = np.repeat(samples, 2)
+    assert np.allclose(pcm_to_samples(samples_to_pcm(stereo), channels=2), samples, atol=1e-4)
+
+
+def test_frame_rms_drops_partial_frame():
+    assert len(frame_rms(np.ones(250, dtype=np.float32), 24000)) == 1
+    assert len(frame_rms(np.ones(100, dtype=np.float32), 24000)) == 0
+
+
+def test_trim_silence_keeps_padding():
+    rate = NARRATION_RATE
+    samples = np.concatenate([np.zeros(rate), tone(1.0), np.zeros(rate)])
+    trimmed = trim_silence(samples, rate, pad=0.1)
+    assert len(trimmed) / rate == pytest.approx(1.2, abs=0.02)
+
+
+def test_silent_and_short_clips_are_left_alone():
+    for samples in (np.zeros(NARRATION_RATE, dtype=np.float32), np.zeros(10, dtype=np.float32)):
+        assert np.array_equal(trim_silence(samples, NARRATION_RATE), samples)
+        assert np.array_equal(normalise_loudness(samples, NARRATION_RATE), samples)
+
+
+def test_normalise_reaches_target_without_clipping():
+    quiet = normalise_loudness(tone(1.0, amplitude=0.05), NARRATION_RATE)
+    assert dbfs(quiet) == pytest.approx(TARGET_DBFS, abs=0.5)
+    loud = normalise_loudness(tone(1.0, amplitude=0.99), NARRATION_RATE, target_dbfs=0.0)
+    assert np.abs(loud).max() <= 10 ** (-1.0 / 20) + 1e-6
+
+
+@pytest.mark.parametrize("rate,seconds", [(16000, 1.0), (22050, 0.5), (44100, 0.25), (48000, 0.01)])
+def test_resample_lengths(rate, seconds):
+    samples = tone(seconds, rate=rate)
+    resampled = resample(samples, rate)
+    assert len(resampled) == round(len(samples) * NARRATION_RATE / rate)
+    assert resampled.dtype == np.float32
+
+
+def test_resample_same_rate_and_empty():
+    samples = tone(0.1)
+    assert resample(samples, NARRATION_RATE) is samples
+    assert len(resample(np.empty(0, dtype=np.float32), 16000)) == 0
+
+
+def test_fade_edges():
+    faded = fade_edges(np.ones(1000, dtype=np.float32), NARRATION_RATE)
+    assert faded[0] == 0.0 and faded[-1] == 0.0 and faded[500] == 1.0
+    assert len(fade_edges(np.ones(1, dtype=np.float32), NARRATION_RATE)) == 1
+
+
+def test_clip_and_track_are_written_at_narration_rate(tmp_path):
+    rate = 16000
+    pcm = samples_to_pcm(np.concatenate([np.zeros(rate // 2), tone(1.0, rate=rate), np.zeros(rate // 2)]))
+    clip = write_narration_clip(str(tmp_path / "clip.wav"), pcm, rate=rate)
+    samples, clip_rate = read_wav(clip)
+    assert clip_rate == NARRATION_RATE
+    assert wav_duration(clip) == pytest.approx(1.3, abs=0.03)
+
+    other = str(tmp_path / "other.wav")
+    wave_file(other, samples_to_pcm(tone(0.5, rate=rate)), rate=rate)
+    track = build_narration([clip, other], str(tmp_path / "track.wav"))
+    assert read_wav(track)[1] == NARRATION_RATE
+    assert wav_duration(track) == pytest.approx(wav_duration(clip) + 0.5, abs=0.01)
@@ -0,0 +1,50 @@
+"""
+Tests for the streamed JSON array parser in utils/json_stream.py.
+"""
+import json
+import pytest
+from utils.json_stream import ArrayItemStream
+
+DOCUMENT = {
+    "presentation_title": "Slides [draft] {v2}",
+    "outline": ["not", "this", "array"],
+    "slides": [
+        {"title": "Intro", "content": ["a", "b"], "narration": ["Say \"hi\".", "Use a \\ slash.", "]}"]},
+        {"title": "Nested", "content": [], "meta": {"slides": [1, 2]}},
+    ],
+    "meta_tags": ["x"],
+}
+
+
+def feed_in_chunks(stream, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(stream.feed(text[start:start + size]))
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10000])
+def test_elements_split_across_chunks(size):
+    text = json.dumps(DOCUMENT, indent=2)
+    assert feed_in_chunks(ArrayItemStream("slides"), text, size) == DOCUMENT["slides"]
+
+
+def test_element_is_returned_as_soon_as_it_closes():
+    stream = ArrayItemStream("slides")
+    assert stream.feed('{"slides": [{"title": "One"}, {"tit') == [{"title": "One"}]
+    assert stream.feed('le": "Two"') == []
+    assert stream.feed('}]}') == [{"title": "Two"}]
+
+
+def test_scalar_elements():
+    text = '{"values": [1, -2.5, true, null, "s"], "other": [9]}'
+    assert feed_in_chunks(ArrayItemStream("values"), text, 3) == [1, -2.5, True, None, "s"]
+
+
+def test_key_inside_nested_object_is_ignored():
+    assert ArrayItemStream("slides").feed('{"meta": {"slides": [1, 2]}, "slides": [3]}') == [3]
+
+
+def test_malformed_element_raises():
+    with pytest.raises(ValueError, match="slides"):
+        ArrayItemStream("slides").feed('{"slides": [{"title": }]}')
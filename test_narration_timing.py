@@ -0,0 +1,61 @@
+"""
+Tests for pause detection and per-page timing in utils/narration_timing.py.
+"""
+import numpy as np
+import pytest
+from utils.audio_utils import samples_to_pcm, wave_file
+from utils.narration_timing import find_pauses, page_durations
+
+RATE = 24000
+
+
+def tone(seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def write_clip(path, *parts):
+    wave_file(str(path), samples_to_pcm(np.concatenate(parts)), rate=RATE)
+    return str(path)
+
+
+def test_silent_and_short_clips_have_no_pauses():
+    for samples in (silence(1.0), np.zeros(10, dtype=np.float32), np.empty(0, dtype=np.float32)):
+        midpoints, lengths = find_pauses(samples, RATE)
+        assert len(midpoints) == 0 and len(lengths) == 0
+
+
+def test_finds_inner_pause_and_ignores_edges():
+    samples = np.concatenate([silence(0.3), tone(1.0), silence(0.4), tone(1.0), silence(0.3)])
+    midpoints, lengths = find_pauses(samples, RATE)
+    assert len(midpoints) == 1
+    assert midpoints[0] == pytest.approx(1.5, abs=0.02)
+    assert lengths[0] == pytest.approx(0.4, abs=0.02)
+
+
+def test_gaps_shorter_than_a_pause_are_ignored():
+    samples = np.concatenate([tone(1.0), silence(0.05), tone(1.0)])
+    assert len(find_pauses(samples, RATE)[0]) == 0
+
+
+def test_pages_snap_to_the_pause(tmp_path):
+    # The first line is short but spoken slowly, so the text estimate alone would be early
+    path = write_clip(tmp_path / "clip.wav", tone(2.0), silence(0.4), tone(1.6))
+    durations = page_durations(path, ["Short line.", "A much longer second line of narration."], 2, 4.0)
+    assert durations[0] == pytest.approx(2.2, abs=0.02)
+    assert sum(durations) == pytest.approx(4.0)
+
+
+def test_mismatched_lines_split_evenly(tmp_path):
+    path = write_clip(tmp_path / "clip.wav", tone(3.0))
+    assert page_durations(path, ["Only one line."], 3, 3.0) == [1.0, 1.0, 1.0]
+    assert page_durations(path, "One string.", 1, 3.0) == [3.0]
+
+
+def test_unreadable_audio_falls_back_to_text_estimate(tmp_path):
+    durations = page_durations(str(tmp_path / "missing.wav"), ["One.", "Two two two."], 2, 3.0)
+    assert durations == pytest.approx([0.75, 2.25])
@@ -0,0 +1,35 @@
+"""
+Tests for the single-flight prefetch registry in utils/prefetch.py.
+"""
+import asyncio
+from utils import prefetch
+
+
+def test_stage_joins_the_prefetch_in_flight():
+    calls = []
+
+    async def make():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "/cache/clip.wav"
+
+    async def run():
+        prefetch.start("key", make)
+        prefetch.start("key", make)  # a duplicate slide does not start a second request
+        return await prefetch.join("key"), await prefetch.join("other")
+
+    assert asyncio.run(run()) == ("/cache/clip.wav", None)
+    assert calls == [1]
+
+
+def test_finished_and_failed_prefetches_are_forgotten():
+    async def fail():
+        raise RuntimeError("quota")
+
+    async def run():
+        task = prefetch.start("failing", fail)
+        assert await prefetch.join("failing") is None
+        await asyncio.sleep(0)
+        return task.done(), await prefetch.join("failing")
+
+    assert asyncio.run(run()) == (True, None)
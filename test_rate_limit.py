@@ -0,0 +1,36 @@
+"""
+Tests for the shared request limiters in utils/rate_limit.py.
+"""
+import asyncio
+import time
+from utils import rate_limit
+
+
+def test_concurrent_image_runs_share_one_budget(monkeypatch):
+    monkeypatch.setenv("IMAGE_REQUESTS_PER_MINUTE", "600")  # 10 per second
+    monkeypatch.setenv("IMAGE_BURST", "2")
+    monkeypatch.setattr(rate_limit, "_image_bucket", None)
+
+    async def run(requests):
+        # What each generate_images call does: look up the limiter, then acquire per image
+        bucket = rate_limit.image_rate_limiter()
+        for _ in range(requests):
+            await bucket.acquire()
+        return bucket
+
+    async def two_jobs():
+        started = time.monotonic()
+        buckets = await asyncio.gather(run(3), run(3))
+        return buckets, time.monotonic() - started
+
+    (first, second), elapsed = asyncio.run(two_jobs())
+    assert first is second
+    # Six requests against a burst of two leave four to refill at 10/s; separate
+    # buckets per run would have finished after one refill (0.1s)
+    assert elapsed >= 0.35
+
+
+def test_bucket_can_be_reused_from_another_event_loop():
+    bucket = rate_limit.TokenBucket(rate=100, capacity=1)
+    asyncio.run(bucket.acquire())
+    asyncio.run(bucket.acquire())
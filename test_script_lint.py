@@ -0,0 +1,72 @@
+"""
+Tests for the deterministic script checks in utils/script_lint.py.
+"""
+from utils.script_lint import lint_slide, lint_script, split_sentences, MAX_SENTENCE_CHARS
+
+
+def rules(violations):
+    return [v["rule"] for v in violations]
+
+
+def test_prompt_acknowledgement_slide_passes():
+    # Slide 14 exactly as the script prompt mandates it
+    slide = {
+        "title": "Acknowledgement",
+        "content": [],
+        "narration": ["This Spoken Tutorial is brought to you by EduPyramids Educational Services "
+                      "Private Limited, SINE, IIT Bombay.\nThank you for joining!"],
+    }
+    assert lint_slide(14, slide) == []
+
+
+def test_prompt_assignment_slide_passes():
+    slide = {
+        "title": "Assignment",
+        "content": ["Rewrite a vague prompt"],
+        "narration": [
+            "Now as an assignment, take a vague prompt and make it specific.",
+            "First, add a role. \nThen add an example. \nCompare the results. \n"
+            "Note down which change made the biggest difference.",
+        ],
+    }
+    assert lint_slide(13, slide) == []
+
+
+def test_mandated_exemption_does_not_cover_other_long_sentences():
+    long_sentence = "This Spoken Tutorial is brought to you by " + "a very long list of sponsors " * 3 + "today."
+    assert len(long_sentence) > MAX_SENTENCE_CHARS
+    assert rules(lint_slide(1, {"content": [], "narration": [long_sentence]})) == ["sentence_length"]
+
+
+def test_narration_count():
+    slide = {"content": ["One", "Two"], "narration": ["Title line.", "First point."]}
+    assert rules(lint_slide(1, slide)) == ["narration_count"]
+
+
+def test_dashes():
+    for line in ["Prompts - like questions - matter.", "Prompts -- matter.", "Prompts—matter.", "Range 1–2."]:
+        assert rules(lint_slide(1, {"content": [], "narration": [line]})) == ["symbol"], line
+    # Hyphenated words are fine
+    assert lint_slide(1, {"content": [], "narration": ["A well-known, step-by-step method."]}) == []
+
+
+def test_arrows_and_symbols():
+    for line, kind in [("Input -> output.", "arrow"), ("Use the → key.", "arrow"),
+                       ("Type x = 5.", "symbol"), ("Use *bold* text.", "symbol"), ("Tag it #ai.", "symbol")]:
+        violations = lint_slide(1, {"content": [], "narration": [line]})
+        assert rules(violations) == ["symbol"], line
+        assert kind in violations[0]["message"]
+
+
+def test_cliche_with_curly_apostrophe():
+    violations = lint_slide(1, {"content": [], "narration": ["Let’s dive in."]})
+    assert rules(violations) == ["cliche"]
+
+
+def test_split_sentences():
+    assert split_sentences("One. Two!\nThree? ") == ["One.", "Two!", "Three?"]
+
+
+def test_lint_script_numbers_slides_from_one():
+    script = {"slides": [{"content": [], "narration": ["Fine."]}, {"content": [], "narration": []}]}
+    assert [v["slide"] for v in lint_script(script)] == [2]
@@ -0,0 +1,179 @@
+"""
+Content-addressed on-disk cache for generated media assets (audio, images).
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+CACHE_ROOT = os.getenv("ASSET_CACHE_DIR", ".cache")
+# Eviction frees space down to this fraction of max_bytes, so the directory is
+# walked once per batch of stores rather than on every store near the limit
+EVICT_TO = float(os.getenv("ASSET_CACHE_EVICT_TO", "0.9"))
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def make_key(*parts):
+    """Hashes the given parts into a stable cache key."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AssetCache:
+    """
+    Files are stored under their content key and evicted least-recently-used
+    first once the directory grows past `max_bytes`. Writes go to a unique
+    temp file and are renamed into place, so concurrent requests producing
+    the same asset never see a partial file.
+
+    The cache size is tracked as a running total, so a store only walks the
+    directory when it pushes the total over the limit.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._bytes = None  # measured on the first store
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key, ext):
+        return os.path.join(self.directory, key[:2], f"{key}{ext}")
+
+    def get(self, key, ext):
+        """Returns the cached path for `key`, or None on a miss."""
+        path = self.path_for(key, ext)
+        if os.path.exists(path):
+            try:
+                os.utime(path)  # mark as recently used
+            except FileNotFoundError:
+                path = None
+        else:
+            path = None
+
+        with self._lock:
+            if path:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return os.path.abspath(path) if path else None
+
+    def _temp_path(self, key, ext):
+        path = self.path_for(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path, f"{path}.{uuid.uuid4().hex}.tmp{ext}"
+
+    def _commit(self, tmp_path, path):
+        size = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._bytes += size - replaced
+            over = self._bytes > self.max_bytes
+        if over:
+            self.evict(keep=path)
+        return os.path.abspath(path)
+
+    def store(self, key, ext, write):
+        """
+        Calls `write(tmp_path)` to produce the asset, then moves it into the
+        cache. Returns the final absolute path.
+        """
+        path, tmp_path = self._temp_path(key, ext)
+        try:
+            write(tmp_path)
+            return self._commit(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def astore(self, key, ext, write):
+        """Like store(), for an async `write(tmp_path)` such as a streamed download."""
+        path, tmp_path = self._temp_path(key, ext)
+        try:
+            await write(tmp_path)
+            return self._commit(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def store_bytes(self, key, ext, data):
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        return self.store(key, ext, write)
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if ".tmp" in name:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self, keep=None):
+        """
+        Deletes least recently used files until the cache fits in max_bytes,
+        freeing down to EVICT_TO of it once eviction is needed.
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICT_TO if total > self.max_bytes else self.max_bytes
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            # Resynchronised with the disk, which other processes may also write to
+            self._bytes = total
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def get_cache(name, default_max_mb=512):
+    """Returns the process-wide cache called `name` (e.g. "audio")."""
+    with _caches_lock:
+        if name not in _caches:
+            max_mb = float(os.getenv(f"{name.upper()}_CACHE_MAX_MB", default_max_mb))
+            _caches[name] = AssetCache(os.path.join(CACHE_ROOT, name), int(max_mb * 1024 * 1024))
+        return _caches[name]
+
+
+def cache_stats():
+    """Hit/miss counters and sizes for every cache used by this process."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -1,7 +1,25 @@
 """
 Audio utility functions.
+
+Narration clips are cleaned up with NumPy when they are stored: leading and
+trailing dead air is trimmed, loudness is normalised, and everything is
+resampled to one rate, so slides sound consistent and can be joined directly.
 """
+import os
 import wave
+import numpy as np
+
+NARRATION_RATE = 24000
+TARGET_DBFS = float(os.getenv("NARRATION_TARGET_DBFS", "-20"))
+PEAK_DBFS = -1.0
+MAX_GAIN_DB = 20.0
+SILENCE_DB = -40.0
+TRIM_PAD_SECONDS = 0.15
+FADE_SECONDS = 0.01
+
+# Bump when the processing above changes, so cached clips are regenerated
+NARRATION_FORMAT = 1
+
 
 def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
     with wave.open(filename, "wb") as wf:
@@ -9,3 +27,110 @@ def wave_file(filename, pcm, channels=1, rate=24000, sample_width=2):
         wf.setsampwidth(sample_width)
         wf.setframerate(rate)
         wf.writeframes(pcm)
+
+def wav_duration(filename):
+    """Duration of a WAV file in seconds."""
+    with wave.open(filename, "rb") as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+def pcm_to_samples(pcm, channels=1):
+    """16-bit little-endian PCM -> mono float32 in [-1, 1]. The PCM is viewed, not copied."""
+    samples = np.frombuffer(pcm, dtype="<i2")
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32) / 32768.0
+
+def samples_to_pcm(samples):
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+def read_wav(filename):
+    """Returns (mono float32 samples, sample rate) for a 16-bit PCM WAV."""
+    with wave.open(filename, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Expected 16-bit PCM in {filename}")
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        pcm = wf.readframes(wf.getnframes())
+    return pcm_to_samples(pcm, channels), rate
+
+def frame_rms(samples, rate, frame_seconds=0.01):
+    """RMS level of each `frame_seconds` frame (the tail shorter than a frame is dropped)."""
+    frame = max(1, int(rate * frame_seconds))
+    count = len(samples) // frame
+    if count == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:count * frame].reshape(count, frame)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+
+def trim_silence(samples, rate, threshold_db=SILENCE_DB, pad=TRIM_PAD_SECONDS, frame_seconds=0.01):
+    """Cuts leading/trailing frames quieter than `threshold_db` below the loudest frame, keeping `pad` seconds."""
+    rms = frame_rms(samples, rate, frame_seconds)
+    if not len(rms) or rms.max() <= 0:
+        return samples
+    voiced = np.flatnonzero(rms >= rms.max() * 10 ** (threshold_db / 20))
+    frame = max(1, int(rate * frame_seconds))
+    start = max(0, voiced[0] * frame - int(pad * rate))
+    end = min(len(samples), (voiced[-1] + 1) * frame + int(pad * rate))
+    return samples[start:end]
+
+def normalise_loudness(samples, rate, target_dbfs=TARGET_DBFS):
+    """
+    Scales the clip so its speech (frames above the silence gate, as in
+    LUFS gating) averages `target_dbfs` RMS, without pushing peaks past
+    PEAK_DBFS or boosting by more than MAX_GAIN_DB.
+    """
+    rms = frame_rms(samples, rate)
+    if not len(rms) or rms.max() <= 0:
+        return samples
+    gated = rms[rms >= rms.max() * 10 ** (SILENCE_DB / 20)]
+    level = np.sqrt(np.mean(np.square(gated)))
+    gain = min(10 ** (target_dbfs / 20) / level, 10 ** (MAX_GAIN_DB / 20))
+    peak = np.abs(samples).max()
+    gain = min(gain, 10 ** (PEAK_DBFS / 20) / peak)
+    return (samples * gain).astype(np.float32)
+
+def resample(samples, rate, target_rate=NARRATION_RATE):
+    """Linear-interpolation resampling; speech at these rates needs nothing finer."""
+    if rate == target_rate or not len(samples):
+        return samples
+    count = int(round(len(samples) * target_rate / rate))
+    positions = np.arange(count, dtype=np.float64) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+def fade_edges(samples, rate, seconds=FADE_SECONDS):
+    """Short linear fade in/out so clips butt-joined together never click."""
+    n = min(int(rate * seconds), len(samples) // 2)
+    if n == 0:
+        return samples
+    samples = samples.copy()
+    ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+    samples[:n] *= ramp
+    samples[-n:] *= ramp[::-1]
+    return samples
+
+def process_clip(samples, rate):
+    """Trim, normalise, resample to NARRATION_RATE and de-click one narration clip."""
+    samples = trim_silence(samples, rate)
+    samples = normalise_loudness(samples, rate)
+    samples = resample(samples, rate, NARRATION_RATE)
+    return fade_edges(samples, NARRATION_RATE)
+
+def write_narration_clip(filename, pcm, rate=24000, channels=1):
+    """Processes raw 16-bit PCM from a TTS response and writes it as a narration WAV."""
+    samples = process_clip(pcm_to_samples(pcm, channels), rate)
+    wave_file(filename, samples_to_pcm(samples), rate=NARRATION_RATE)
+    return filename
+
+def build_narration(filenames, output):
+    """
+    Joins the slides' narration clips into one track in a single write.
+    Clips in another format are resampled to NARRATION_RATE first.
+    """
+    clips = []
+    for filename in filenames:
+        samples, rate = read_wav(filename)
+        if rate != NARRATION_RATE:
+            samples = fade_edges(resample(samples, rate), NARRATION_RATE)
+        clips.append(samples)
+    track = np.concatenate(clips) if clips else np.empty(0, dtype=np.float32)
+    wave_file(output, samples_to_pcm(track), rate=NARRATION_RATE)
+    return output
@@ -0,0 +1,166 @@
+"""
+Thin helpers around the ffmpeg binary used by the video node.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+
+VIDEO_WIDTH = int(os.getenv("VIDEO_WIDTH", "1920"))
+VIDEO_HEIGHT = int(os.getenv("VIDEO_HEIGHT", "1080"))
+VIDEO_FPS = int(os.getenv("VIDEO_FPS", "24"))
+SEGMENT_AUDIO_RATE = 48000
+
+
+def ffmpeg_exe():
+    """Prefers the ffmpeg on PATH, falling back to the binary bundled with imageio-ffmpeg."""
+    exe = shutil.which("ffmpeg")
+    if exe:
+        return exe
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(args, duration=None, on_progress=None):
+    """
+    Runs ffmpeg with `args`, raising RuntimeError with its stderr on failure.
+    If `on_progress` is given, it is called with the encoded percentage of
+    `duration` seconds as ffmpeg reports it.
+    """
+    cmd = [ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error"]
+    if not (on_progress and duration):
+        result = subprocess.run(cmd + args, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace')[-2000:]}")
+        return
+
+    # stderr goes to a file so a chatty encoder can never block the progress pipe
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd + ["-progress", "pipe:1", "-nostats"] + args,
+                                stdout=subprocess.PIPE, stderr=stderr, text=True)
+        last_percent = -1
+        for line in proc.stdout:
+            key, _, value = line.strip().partition("=")
+            if key == "out_time_us" and value.isdigit():
+                percent = min(100, int(int(value) / 1e6 / duration * 100))
+                if percent != last_percent:
+                    last_percent = percent
+                    on_progress(percent)
+        if proc.wait() != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg failed: {stderr.read().decode(errors='replace')[-2000:]}")
+
+
+def decode_to_pcm(data, rate=24000):
+    """Decodes an encoded clip (e.g. MP3 from a TTS service) to mono 16-bit PCM at `rate`."""
+    result = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(rate), "pipe:1"],
+        input=data, capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace')[-2000:]}")
+    return result.stdout
+
+
+def _quote(path):
+    return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+
+def write_concat_list(entries, list_path):
+    """
+    Writes an ffmpeg concat demuxer list for (image_path, duration) entries.
+    The last image is repeated because the demuxer ignores the final duration.
+    """
+    lines = ["ffconcat version 1.0"]
+    for image_path, duration in entries:
+        lines.append(f"file {_quote(image_path)}")
+        lines.append(f"duration {duration:.3f}")
+    if entries:
+        lines.append(f"file {_quote(entries[-1][0])}")
+    with open(list_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return list_path
+
+
+def concat_segments(segment_paths, output_path):
+    """Joins segments written by encode_stills(segment=True) into one MP4 without re-encoding."""
+    list_path = f"{output_path}.segments.txt"
+    with open(list_path, "w") as f:
+        f.write("ffconcat version 1.0\n")
+        f.writelines(f"file {_quote(path)}\n" for path in segment_paths)
+    try:
+        run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path,
+        ])
+    finally:
+        os.remove(list_path)
+    return output_path
+
+
+def fit_page(page_width, page_height, width=VIDEO_WIDTH, height=VIDEO_HEIGHT):
+    """
+    Returns (x, y, w, h) of a page letterboxed into the video frame, with even
+    dimensions as required by yuv420p.
+    """
+    scale = min(width / page_width, height / page_height)
+    w = int(page_width * scale) // 2 * 2
+    h = int(page_height * scale) // 2 * 2
+    return (width - w) // 2, (height - h) // 2, w, h
+
+
+def encode_stills(list_path, audio_path, output_path, duration, overlays=(), page_box=None, on_progress=None,
+                  segment=False):
+    """
+    Encodes the still pages in `list_path` with `audio_path` as the soundtrack.
+
+    `overlays` is a list of (video_path, start, end) Veo backgrounds that are
+    looped and composited over the right half of the page during [start, end).
+    `page_box` is the (x, y, w, h) of the page inside the frame, from fit_page().
+    With `segment`, the audio format is fixed so segments from different
+    slides can be joined by concat_segments().
+    """
+    inputs = ["-f", "concat", "-safe", "0", "-i", list_path, "-i", audio_path]
+    filters = [
+        f"[0:v]scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={VIDEO_WIDTH}:{VIDEO_HEIGHT}:(ow-iw)/2:(oh-ih)/2:white,fps={VIDEO_FPS},setsar=1[base0]"
+    ]
+
+    x0, _, page_w, _ = page_box or (0, 0, VIDEO_WIDTH, VIDEO_HEIGHT)
+    overlay_w = page_w // 2 // 2 * 2
+    overlay_x = x0 + page_w - overlay_w
+    last = "base0"
+    for k, (video_path, start, end) in enumerate(overlays):
+        inputs += ["-stream_loop", "-1", "-i", video_path]
+        filters.append(
+            f"[{k + 2}:v]trim=duration={end - start:.3f},setpts=PTS-STARTPTS+{start:.3f}/TB,"
+            f"scale={overlay_w}:-2[veo{k}]"
+        )
+        filters.append(
+            f"[{last}][veo{k}]overlay=x={overlay_x}:y=(H-h)/2:"
+            f"enable='between(t,{start:.3f},{end:.3f})':eof_action=pass[base{k + 1}]"
+        )
+        last = f"base{k + 1}"
+    filters.append(f"[{last}]format=yuv420p[vout]")
+
+    video_opts = ["-c:v", "libx264", "-preset", "veryfast", "-r", str(VIDEO_FPS)]
+    if not overlays:
+        video_opts += ["-tune", "stillimage"]
+
+    output_opts = ["-movflags", "+faststart", "-f", "mp4"]
+    if segment:
+        output_opts = ["-ar", str(SEGMENT_AUDIO_RATE), "-ac", "2"] + output_opts
+
+    run_ffmpeg(inputs + [
+        "-filter_complex", ";".join(filters),
+        "-map", "[vout]", "-map", "1:a",
+    ] + video_opts + [
+        "-c:a", "aac", "-b:a", "192k",
+        "-t", f"{duration:.3f}",
+    ] + output_opts + [
+        output_path,
+    ], duration=duration, on_progress=on_progress)
+    return output_path
@@ -0,0 +1,136 @@
+"""
+Process-wide Gemini client with pooled, keep-alive HTTP transports and
+per-model concurrency limits.
+
+Nodes call get_client() instead of constructing genai.Client per
+invocation, so TLS connections are reused across requests and jobs.
+Tests and benchmarks can install a fake with set_client().
+"""
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+import httpx
+from google import genai
+from google.genai import types
+
+# Connection pool per transport
+GENAI_MAX_CONNECTIONS = int(os.getenv("GENAI_MAX_CONNECTIONS", "32"))
+GENAI_MAX_KEEPALIVE = int(os.getenv("GENAI_MAX_KEEPALIVE", "16"))
+GENAI_KEEPALIVE_SECONDS = float(os.getenv("GENAI_KEEPALIVE_SECONDS", "60"))
+# Whole-request timeout; long TTS and image responses need generous reads
+GENAI_TIMEOUT_SECONDS = float(os.getenv("GENAI_TIMEOUT_SECONDS", "300"))
+# HTTP/2 multiplexes concurrent requests over one connection; needs the h2 package (in requirements.txt)
+GENAI_HTTP2 = os.getenv("GENAI_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+# Concurrent in-flight requests per model, e.g. "gemini-2.5-flash=8,gemini-2.5-flash-image=4"
+GENAI_DEFAULT_CONCURRENCY = int(os.getenv("GENAI_DEFAULT_CONCURRENCY", "8"))
+MODEL_CONCURRENCY = {
+    model.strip(): int(limit)
+    for model, _, limit in (item.partition("=") for item in os.getenv("GENAI_MODEL_CONCURRENCY", "").split(","))
+    if model.strip() and limit
+}
+
+_lock = threading.Lock()
+_override = None
+_sync_client = None
+# The async transport's connections belong to the loop that opened them,
+# so each event loop gets its own client (dropped when the loop is collected)
+_loop_clients = weakref.WeakKeyDictionary()
+_model_limits = {}
+
+
+def _transport_args():
+    return {
+        "limits": httpx.Limits(
+            max_connections=GENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=GENAI_MAX_KEEPALIVE,
+            keepalive_expiry=GENAI_KEEPALIVE_SECONDS,
+        ),
+        "http2": GENAI_HTTP2,
+    }
+
+
+def create_client(api_key=None):
+    """
+    Builds a genai.Client with pooled transports; most code wants get_client().
+
+    The httpx clients are passed in ready-made: given only client args,
+    google-genai sends `client.aio` requests through its own unpooled
+    aiohttp session whenever aiohttp is installed.
+    """
+    return genai.Client(
+        api_key=api_key or os.getenv("GOOGLE_API_KEY"),
+        http_options=types.HttpOptions(
+            timeout=int(GENAI_TIMEOUT_SECONDS * 1000),  # milliseconds
+            httpx_client=httpx.Client(**_transport_args()),
+            httpx_async_client=httpx.AsyncClient(**_transport_args()),
+        ),
+    )
+
+
+def get_client():
+    """
+    Returns the shared client. Inside an event loop this is the loop's own
+    client, so sync nodes (worker threads) and async nodes never share an
+    async transport across loops.
+    """
+    global _sync_client
+    with _lock:
+        if _override is not None:
+            return _override
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            if _sync_client is None:
+                _sync_client = create_client()
+            return _sync_client
+        if loop not in _loop_clients:
+            _loop_clients[loop] = create_client()
+        return _loop_clients[loop]
+
+
+def set_client(client):
+    """Makes get_client() return `client` (e.g. a fake); None restores the real one."""
+    global _override
+    with _lock:
+        _override = client
+
+
+class ModelLimit:
+    """
+    Caps in-flight requests for one model across every job in the process.
+    Usable as `with` from worker threads and `async with` from coroutines.
+    """
+
+    def __init__(self, model, limit):
+        self.model = model
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        # Poll rather than block the loop, like the stage limits
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(0.02)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
+
+
+def model_limit(model):
+    """Returns the process-wide ModelLimit for `model`."""
+    with _lock:
+        if model not in _model_limits:
+            _model_limits[model] = ModelLimit(model, MODEL_CONCURRENCY.get(model, GENAI_DEFAULT_CONCURRENCY))
+        return _model_limits[model]
@@ -0,0 +1,123 @@
+"""
+Local image backends for slides: a Pillow title card used for draft runs
+and as the fallback when the image model fails, and a stub for tests.
+Gemini/Veo generation itself lives in the media node.
+"""
+import functools
+import hashlib
+import os
+from PIL import Image, ImageDraw, ImageFont
+from utils.asset_cache import get_cache, make_key
+
+# "gemini" for generated images, "draft" for instant title cards, "stub" for tests
+DEFAULT_IMAGE_BACKEND = os.getenv("IMAGE_BACKEND", "gemini")
+# Used when a generated image fails; set to "" to ship such slides without an image
+IMAGE_FALLBACK = os.getenv("IMAGE_FALLBACK", "draft")
+
+# (background, panel, title, text) per audience
+PALETTES = {
+    'kids': ("#FFB703", "#FFF3C4", "#8A3B00", "#5C4A00"),
+    'students': ("#219EBC", "#E3F4FA", "#023047", "#2F5D73"),
+    'professionals': ("#334155", "#F1F5F9", "#0F172A", "#475569"),
+    'general': ("#2A9D8F", "#E9F5F3", "#1D3557", "#40605B"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _font(size):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _wrap(text, font, width, max_lines):
+    """Greedy word wrap to `width` pixels, ending in an ellipsis when cut short."""
+    lines = []
+    for word in text.split():
+        if lines and font.getlength(f"{lines[-1]} {word}") <= width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        while " " in lines[-1] and font.getlength(lines[-1] + " …") > width:
+            lines[-1] = lines[-1].rsplit(" ", 1)[0]
+        lines[-1] += " …"
+    return lines
+
+
+class DraftImages:
+    """
+    Renders a styled title card from the slide title and image prompt in a
+    few milliseconds, so layout can be reviewed before paying for images.
+    """
+    name = "draft"
+    SIZE = 768
+    VERSION = 1
+
+    def cache_key(self, slide, audience):
+        return make_key(self.name, self.VERSION, self.SIZE, slide.get('title'), slide.get('image_prompt'), audience)
+
+    def draw(self, slide, audience):
+        background, panel, title_colour, text_colour = PALETTES.get(audience, PALETTES['general'])
+        size = self.SIZE
+        image = Image.new("RGB", (size, size), background)
+        draw = ImageDraw.Draw(image)
+        margin = size // 12
+        draw.rounded_rectangle((margin, margin, size - margin, size - margin), radius=size // 24, fill=panel)
+
+        inner = size - 4 * margin
+        y = 2 * margin
+        title_font = _font(size // 14)
+        for line in _wrap(slide.get('title') or "Untitled", title_font, inner, 3):
+            draw.text((2 * margin, y), line, font=title_font, fill=title_colour)
+            y += int(title_font.size * 1.25)
+
+        y += margin // 2
+        draw.line((2 * margin, y, size - 2 * margin, y), fill=background, width=max(2, size // 160))
+        y += margin // 2
+
+        text_font = _font(size // 28)
+        line_height = int(text_font.size * 1.4)
+        max_lines = max(0, (size - 2 * margin - y) // line_height)
+        for line in _wrap(slide.get('image_prompt') or "", text_font, inner, max_lines):
+            draw.text((2 * margin, y), line, font=text_font, fill=text_colour)
+            y += line_height
+        return image
+
+    def render(self, slide, audience, cache=None):
+        """Returns the path of the card for `slide`, drawing it on a cache miss."""
+        cache = cache or get_cache("images", default_max_mb=2048)
+        key = self.cache_key(slide, audience)
+        path = cache.get(key, ".png")
+        if path:
+            return path
+        image = self.draw(slide, audience)
+        return cache.store(key, ".png", lambda tmp_path: image.save(tmp_path, format="PNG", compress_level=1))
+
+
+class StubImages(DraftImages):
+    """Offline and deterministic: a small flat square coloured from the prompt."""
+    name = "stub"
+    SIZE = 64
+
+    def draw(self, slide, audience):
+        digest = hashlib.sha256((slide.get('image_prompt') or "").encode("utf-8")).digest()
+        return Image.new("RGB", (self.SIZE, self.SIZE), tuple(digest[:3]))
+
+
+LOCAL_IMAGE_BACKENDS = {backend.name: backend for backend in (DraftImages, StubImages)}
+
+_instances = {}
+
+
+def local_image_backend(name):
+    """The local backend called `name`, or None for "gemini" and unset names."""
+    if not name or name == "gemini":
+        return None
+    if name not in LOCAL_IMAGE_BACKENDS:
+        raise ValueError(f"Unknown image backend '{name}' (choose from gemini, {', '.join(LOCAL_IMAGE_BACKENDS)})")
+    if name not in _instances:
+        _instances[name] = LOCAL_IMAGE_BACKENDS[name]()
+    return _instances[name]
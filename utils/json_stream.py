@@ -0,0 +1,103 @@
+"""
+Incremental JSON parsing for streamed model output.
+"""
+import json
+
+
+class ArrayItemStream:
+    """
+    Watches a JSON document arrive in chunks and returns each element of the
+    top-level array `key` as soon as the element's closing bracket arrives,
+    without waiting for (or re-parsing) the rest of the document.
+
+        stream = ArrayItemStream("slides")
+        for chunk in response_chunks:
+            for slide in stream.feed(chunk.text):
+                ...
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.buffer = []  # text of the element currently being read
+        self._pos = 0     # chars consumed, for error messages
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string = []       # current string literal at object-key depth
+        self._last_string = None
+        self._expect_array = False  # saw `"key":`, waiting for `[`
+        self._array_depth = None    # depth inside the target array, once found
+        self._item_start_depth = None
+
+    def feed(self, text):
+        """Consumes `text`; returns the array elements completed by it, parsed."""
+        items = []
+        for ch in text:
+            self._pos += 1
+            if self._item_start_depth is not None:
+                self.buffer.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = "".join(self._string)
+                else:
+                    if self._depth == 1:
+                        self._string.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+                if self._in_target_array() and self._item_start_depth is None:
+                    self._start_item(ch)
+            elif ch == ":":
+                self._expect_array = self._depth == 1 and self._last_string == self.key
+            elif ch in "[{":
+                if self._expect_array and ch == "[":
+                    self._array_depth = self._depth + 1
+                elif self._in_target_array() and self._item_start_depth is None:
+                    self._start_item(ch)
+                self._expect_array = False
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._array_depth is not None and self._depth < self._array_depth:
+                    # The array itself closed, ending any scalar element still being read
+                    if self._item_start_depth is not None:
+                        self.buffer.pop()
+                        items.append(self._finish_item())
+                    self._array_depth = None
+                elif self._item_start_depth is not None and self._depth == self._item_start_depth:
+                    items.append(self._finish_item())
+            elif ch == ",":
+                if self._item_start_depth is not None and self._depth == self._item_start_depth:
+                    # Scalar element (number/literal) ended
+                    self.buffer.pop()
+                    items.append(self._finish_item())
+            elif not ch.isspace():
+                if self._in_target_array() and self._item_start_depth is None:
+                    self._start_item(ch)
+                self._expect_array = False
+        return items
+
+    def _in_target_array(self):
+        return self._array_depth is not None and self._depth == self._array_depth
+
+    def _start_item(self, ch):
+        self._item_start_depth = self._depth
+        self.buffer = [ch]
+
+    def _finish_item(self):
+        text = "".join(self.buffer).strip()
+        self.buffer = []
+        self._item_start_depth = None
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Malformed '{self.key}' element ending at char {self._pos}: {e}") from e
@@ -0,0 +1,119 @@
+"""
+Incremental beamer build: the preamble is dumped once into a pdflatex format
+(mylatexformat), each frame is compiled on its own and cached by content
+hash, and the per-frame PDFs are merged into the final deck.
+"""
+import functools
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import fitz
+from utils.asset_cache import get_cache, make_key
+
+FORMAT_NAME = "preamble"
+# The logo overlay uses tikz `remember picture`, which only lands in place once
+# the page positions written to the .aux on the first pass are read back
+LATEX_PASSES = 2
+MAX_LATEX_PASSES = 4
+_RERUN = re.compile(rb"Rerun to get|Rerun LaTeX|rerunfilecheck.*Rerun")
+
+
+def latex_env():
+    env = os.environ.copy()
+    env["PATH"] = f"/Library/TeX/texbin:/usr/local/bin:{env['PATH']}"
+    return env
+
+
+@functools.lru_cache(maxsize=1)
+def pdflatex_version():
+    """Formats are only valid for the engine that dumped them, so it is part of every key."""
+    result = subprocess.run(["pdflatex", "--version"], capture_output=True, env=latex_env())
+    return result.stdout.decode(errors="replace").splitlines()[0] if result.stdout else "unknown"
+
+
+def run_pdflatex(args, cwd, passes=1):
+    """
+    Runs pdflatex `passes` times, then again (up to MAX_LATEX_PASSES) while
+    LaTeX still asks for a rerun. Raises CalledProcessError on failure.
+    """
+    for run in range(1, MAX_LATEX_PASSES + 1):
+        result = subprocess.run(
+            ["pdflatex", "-interaction=nonstopmode", "-halt-on-error", "-file-line-error"] + args,
+            cwd=cwd, capture_output=True, env=latex_env()
+        )
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, result.args, output=result.stdout, stderr=result.stderr)
+        if run >= passes and not _RERUN.search(result.stdout):
+            break
+
+
+def build_format(preamble):
+    """
+    Dumps `preamble` (everything before \\begin{document}) into a cached
+    pdflatex format. Returns the .fmt path, or None if mylatexformat is not
+    available, in which case frames are compiled with the full preamble.
+    """
+    cache = get_cache("latex")
+    key = make_key("format", pdflatex_version(), preamble)
+    fmt_path = cache.get(key, ".fmt")
+    if fmt_path:
+        return fmt_path
+
+    def dump(tmp_path):
+        with tempfile.TemporaryDirectory() as build_dir:
+            with open(os.path.join(build_dir, f"{FORMAT_NAME}.tex"), "w") as f:
+                f.write(preamble + "\n\\begin{document}\n\\end{document}\n")
+            run_pdflatex(["-ini", f"-jobname={FORMAT_NAME}", "&pdflatex", "mylatexformat.ltx",
+                           f"{FORMAT_NAME}.tex"], cwd=build_dir)
+            shutil.copyfile(os.path.join(build_dir, f"{FORMAT_NAME}.fmt"), tmp_path)
+
+    try:
+        return cache.store(key, ".fmt", dump)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"⚠ Could not dump LaTeX preamble format, compiling frames with full preamble: {e}")
+        return None
+
+
+def compile_frame(preamble, frame, fmt_path):
+    """Compiles one frame into a cached single-frame PDF and returns its path."""
+    cache = get_cache("latex")
+    key = make_key("frame", pdflatex_version(), LATEX_PASSES, preamble, frame)
+    pdf_path = cache.get(key, ".pdf")
+    if pdf_path:
+        return pdf_path
+
+    def build(tmp_path):
+        with tempfile.TemporaryDirectory() as build_dir:
+            header = ""
+            if fmt_path:
+                # %&name makes pdflatex load the dumped format and skip the preamble text
+                os.symlink(fmt_path, os.path.join(build_dir, f"{FORMAT_NAME}.fmt"))
+                header = f"%&{FORMAT_NAME}\n"
+            with open(os.path.join(build_dir, "frame.tex"), "w") as f:
+                f.write(header + preamble + "\n\\begin{document}\n" + frame + "\n\\end{document}\n")
+            run_pdflatex(["frame.tex"], cwd=build_dir, passes=LATEX_PASSES)
+            shutil.copyfile(os.path.join(build_dir, "frame.pdf"), tmp_path)
+
+    return cache.store(key, ".pdf", build)
+
+
+def build_incremental(preamble, frames, output_pdf):
+    """
+    Builds `output_pdf` from `frames`, recompiling only frames whose LaTeX
+    (or the preamble) changed since they were last compiled.
+    """
+    fmt_path = build_format(preamble)
+    workers = int(os.getenv("LATEX_WORKERS", os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        frame_pdfs = list(pool.map(lambda frame: compile_frame(preamble, frame, fmt_path), frames))
+
+    merged = fitz.open()
+    for frame_pdf in frame_pdfs:
+        with fitz.open(frame_pdf) as part:
+            merged.insert_pdf(part)
+    merged.save(output_pdf)
+    merged.close()
+    return output_pdf
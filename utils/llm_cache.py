@@ -0,0 +1,204 @@
+"""
+Persistent cache for Gemini text responses, keyed by model, prompt and
+generation config, that doubles as a record/replay fixture.
+
+LLM_CACHE_MODE:
+    "readwrite" (default) serve hits, store misses
+    "record"    always call the API and overwrite the stored response
+    "replay"    never call the API; a miss raises LLMCacheMiss (offline runs, tests)
+    "off"       no caching
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from utils.asset_cache import CACHE_ROOT, make_key
+from utils.genai_client import model_limit
+
+MODES = ("readwrite", "record", "replay", "off")
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def _config_fingerprint(config):
+    """A JSON-able view of a GenerateContentConfig (or dict), for the cache key."""
+    if config is None:
+        return None
+    if hasattr(config, "model_dump"):
+        return config.model_dump(mode="json", exclude_none=True)
+    return config
+
+
+def cached_response(text):
+    """Stand-in for a GenerateContentResponse served from the cache; usage is None as nothing was billed."""
+    return SimpleNamespace(text=text, usage_metadata=None, cached=True)
+
+
+class LLMCache:
+    """
+    SQLite table of responses. Entries older than `ttl_seconds` are treated
+    as misses (except in replay mode), and the least recently used entries
+    are dropped once the stored text exceeds `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes, ttl_seconds, mode="readwrite"):
+        if mode not in MODES:
+            raise ValueError(f"LLM_CACHE_MODE must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if mode != "off":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " key TEXT PRIMARY KEY, model TEXT, text TEXT, size INTEGER,"
+                    " created_at REAL, accessed_at REAL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call; nodes run on several threads
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:  # commits, or rolls back on error
+                yield db
+        finally:
+            db.close()
+
+    def key(self, model, contents, config=None):
+        return make_key(model, contents, _config_fingerprint(config))
+
+    def get(self, key):
+        """Returns the cached text for `key`, or None on a miss."""
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT text, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.mode != "replay" and now - row[1] > self.ttl_seconds:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row:
+                db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key, model, text):
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, text, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, text, len(text.encode("utf-8")), now, now)
+            )
+            self._evict(db)
+
+    def _evict(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        entries, size = 0, 0
+        if self.mode != "off":
+            with self._connect() as db:
+                entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    # -- Call wrappers -------------------------------------------------------
+
+    def _lookup(self, model, contents, config, bypass):
+        """Returns (key, cached text or None, whether to store the live response)."""
+        if self.mode == "off":
+            return None, None, False
+        key = self.key(model, contents, config)
+        if self.mode == "record" or (bypass and self.mode != "replay"):
+            return key, None, True
+        text = self.get(key)
+        if text is None and self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded {model} response for key {key[:12]}")
+        return key, text, True
+
+    def generate(self, client, model, contents, config=None, bypass=False):
+        """client.models.generate_content(), served from the cache when possible."""
+        key, text, store = self._lookup(model, contents, config, bypass)
+        if text is not None:
+            return cached_response(text)
+        with model_limit(model):
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+        if store and response.text:
+            self.put(key, model, response.text)
+        return response
+
+    async def agenerate(self, client, model, contents, config=None, bypass=False):
+        """client.aio.models.generate_content(), served from the cache when possible."""
+        key, text, store = self._lookup(model, contents, config, bypass)
+        if text is not None:
+            return cached_response(text)
+        async with model_limit(model):
+            response = await client.aio.models.generate_content(model=model, contents=contents, config=config)
+        if store and response.text:
+            self.put(key, model, response.text)
+        return response
+
+    def generate_stream(self, client, model, contents, config=None, bypass=False):
+        """
+        client.models.generate_content_stream(). A hit is yielded as a single
+        chunk; a miss is stored once the stream has completed.
+        """
+        key, text, store = self._lookup(model, contents, config, bypass)
+        if text is not None:
+            yield cached_response(text)
+            return
+        parts = []
+        with model_limit(model):
+            for chunk in client.models.generate_content_stream(model=model, contents=contents, config=config):
+                parts.append(chunk.text or "")
+                yield chunk
+        if store and "".join(parts):
+            self.put(key, model, "".join(parts))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Returns the process-wide LLM response cache, configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_ROOT, "llm.sqlite")),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600,
+                mode=os.getenv("LLM_CACHE_MODE", "readwrite"),
+            )
+        return _cache
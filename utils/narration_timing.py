@@ -0,0 +1,77 @@
+"""
+Page timing for a slide's narration clip. Each page shows while its own
+narration line is spoken, using the pauses in the WAV between lines rather
+than an even split of the clip.
+"""
+import wave
+import numpy as np
+from utils.audio_utils import read_wav, frame_rms
+
+FRAME_SECONDS = 0.01
+# Quieter than this (relative to the clip's loud frames) counts as a pause
+SILENCE_DB = -30.0
+MIN_PAUSE_SECONDS = 0.12
+# How far from the text-length estimate a pause may be and still mark the boundary
+SEARCH_FRACTION = 0.35
+
+
+def find_pauses(samples, rate):
+    """
+    Returns (midpoints, lengths) in seconds of the silent stretches in the
+    clip, ignoring leading and trailing silence.
+    """
+    rms = frame_rms(samples, rate, FRAME_SECONDS)
+    count = len(rms)
+    if count == 0 or rms.max() <= 0:
+        return np.empty(0), np.empty(0)
+    reference = np.percentile(rms, 95)
+    silent = rms < reference * 10 ** (SILENCE_DB / 20)
+
+    # Run starts/ends of silent frames, from the edges of the boolean mask
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    inner = (starts > 0) & (ends < count)
+    long_enough = (ends - starts) * FRAME_SECONDS >= MIN_PAUSE_SECONDS
+    starts, ends = starts[inner & long_enough], ends[inner & long_enough]
+    return (starts + ends) / 2 * FRAME_SECONDS, (ends - starts) * FRAME_SECONDS
+
+
+def page_durations(audio_path, narrations, num_pages, duration):
+    """
+    Splits a slide clip of `duration` seconds across `num_pages` pages, one
+    narration line per page. Boundaries are first estimated from each line's
+    share of the text, then snapped to the longest nearby pause. Falls back
+    to an even split when the lines do not match the pages.
+    """
+    if isinstance(narrations, str):
+        narrations = [narrations]
+    if num_pages <= 1 or len(narrations) != num_pages:
+        return [duration / max(num_pages, 1)] * max(num_pages, 1)
+
+    weights = np.array([max(len(text.strip()), 1) for text in narrations], dtype=np.float64)
+    estimates = np.cumsum(weights)[:-1] / weights.sum() * duration
+
+    try:
+        samples, rate = read_wav(audio_path)
+        midpoints, lengths = find_pauses(samples, rate)
+    except (OSError, ValueError, wave.Error) as e:
+        print(f"⚠ Could not analyse {audio_path} for page timing: {e}")
+        midpoints, lengths = np.empty(0), np.empty(0)
+
+    boundaries = []
+    previous = 0.0
+    for k, estimate in enumerate(estimates):
+        window = SEARCH_FRACTION * weights[k:k + 2].sum() / weights.sum() * duration
+        nearby = (np.abs(midpoints - estimate) <= window) & (midpoints > previous)
+        if nearby.any():
+            # Longer pauses win; closeness to the estimate breaks ties
+            score = lengths - 0.1 * np.abs(midpoints - estimate)
+            boundary = float(midpoints[np.flatnonzero(nearby)[np.argmax(score[nearby])]])
+        else:
+            boundary = float(max(estimate, previous))
+        boundaries.append(boundary)
+        previous = boundary
+
+    times = np.diff(np.concatenate(([0.0], boundaries, [duration])))
+    return [float(t) for t in np.maximum(times, 0.0)]
@@ -0,0 +1,44 @@
+"""
+Single-flight registry for media started ahead of its stage.
+
+While the script streams in, each finished slide's narration clip and
+image are started on the graph's event loop under their asset cache key.
+When the audio and image stages reach a slide, they join the request
+already in flight instead of starting a second one.
+"""
+import asyncio
+
+_inflight = {}  # asset cache key -> asyncio.Task
+
+
+def start(key, make_coro):
+    """
+    Runs `make_coro()` as a task for `key` on the running loop, unless one
+    is already in flight. The coroutine should store its asset in the cache
+    and return the path (or None); its errors are swallowed.
+    """
+    task = _inflight.get(key)
+    if task is not None and not task.done():
+        return task
+
+    async def run():
+        try:
+            return await make_coro()
+        except Exception as e:
+            print(f"⚠ Prefetch failed, its stage will retry: {e}")
+            return None
+
+    task = asyncio.get_running_loop().create_task(run())
+    _inflight[key] = task
+    task.add_done_callback(lambda done: _inflight.pop(key, None) if _inflight.get(key) is done else None)
+    return task
+
+
+async def join(key):
+    """Waits for a prefetch of `key` still in flight on this loop. Returns its path, or None."""
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        return None
+    # Shielded, so a cancelled stage does not cancel work another job may join
+    return await asyncio.shield(task)
+
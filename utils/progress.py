@@ -0,0 +1,17 @@
+"""
+Progress reporting from inside graph nodes.
+
+Events go to LangGraph's custom stream, so they reach anyone running the
+graph with stream_mode="custom" (the job runner forwards them over SSE).
+Outside a graph run, e.g. when a node is called directly, they are dropped.
+"""
+from langgraph.config import get_stream_writer
+
+
+def report_progress(stage, **data):
+    """Emits {"stage": stage, **data} on the graph's custom stream, if any."""
+    try:
+        writer = get_stream_writer()
+    except (RuntimeError, KeyError):
+        return
+    writer({"stage": stage, **data})
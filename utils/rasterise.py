@@ -0,0 +1,55 @@
+"""
+Parallel PDF page rasterisation at the output video resolution.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import fitz
+from utils.ffmpeg_utils import VIDEO_WIDTH, VIDEO_HEIGHT
+
+# Below this many pages the process pool start-up costs more than it saves
+MIN_PAGES_FOR_POOL = 6
+
+
+def page_image_path(out_dir, page_index):
+    return os.path.join(out_dir, f"page_{page_index:04d}.png")
+
+
+def _render_pages(pdf_path, page_indices, out_dir, width, height):
+    """Worker: renders `page_indices` of `pdf_path` to fit inside width x height."""
+    paths = {}
+    # PyMuPDF documents cannot be shared across processes, so each worker opens its own
+    with fitz.open(pdf_path) as doc:
+        for page_index in page_indices:
+            page = doc.load_page(page_index)
+            zoom = min(width / page.rect.width, height / page.rect.height)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            path = page_image_path(out_dir, page_index)
+            pix.save(path)
+            paths[page_index] = path
+    return paths
+
+
+def rasterise_pages(pdf_path, page_indices, out_dir, width=VIDEO_WIDTH, height=VIDEO_HEIGHT, workers=None):
+    """
+    Renders the given pages to PNGs in `out_dir`, sized to fit the video frame.
+    Returns {page_index: image_path}.
+    """
+    page_indices = sorted(set(page_indices))
+    if not page_indices:
+        return {}
+
+    workers = workers or int(os.getenv("RASTER_WORKERS", os.cpu_count() or 1))
+    workers = max(1, min(workers, len(page_indices)))
+    if workers == 1 or len(page_indices) < MIN_PAGES_FOR_POOL:
+        return _render_pages(pdf_path, page_indices, out_dir, width, height)
+
+    # Interleave pages so every worker gets a similar mix of simple and heavy pages
+    chunks = [page_indices[k::workers] for k in range(workers)]
+    paths = {}
+    # spawn avoids forking a process that may be running server threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_render_pages, pdf_path, chunk, out_dir, width, height) for chunk in chunks]
+        for future in futures:
+            paths.update(future.result())
+    return paths
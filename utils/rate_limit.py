@@ -0,0 +1,132 @@
+"""
+Rate limiting helpers shared by the media nodes.
+"""
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, InternalServerError
+
+_image_bucket = None
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows bursts of up to `capacity` requests and
+    refills at `rate` tokens per second.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        """Waits until `tokens` are available and consumes them."""
+        # Buckets are shared process-wide; asyncio locks are bound to one loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock = loop, asyncio.Lock()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+def image_rate_limiter():
+    """
+    Returns the process-wide token bucket for image requests, so concurrent
+    jobs share one IMAGE_REQUESTS_PER_MINUTE budget.
+    """
+    global _image_bucket
+    if _image_bucket is None:
+        per_minute = float(os.getenv("IMAGE_REQUESTS_PER_MINUTE", "60"))
+        burst = int(os.getenv("IMAGE_BURST", "8"))
+        _image_bucket = TokenBucket(rate=per_minute / 60.0, capacity=burst)
+    return _image_bucket
+
+
+class SlidingWindowLimiter:
+    """
+    Async limiter enforcing a requests-per-minute and tokens-per-minute
+    budget over a sliding 60 second window.
+    """
+
+    def __init__(self, rpm, tpm=None, window=60.0):
+        self.rpm = int(rpm)
+        self.tpm = int(tpm) if tpm else None
+        self.window = window
+        self._events = deque()  # (timestamp, tokens)
+        self._lock = None
+        self._loop = None
+
+    def _purge(self, now):
+        while self._events and now - self._events[0][0] >= self.window:
+            self._events.popleft()
+
+    def _has_room(self, tokens):
+        if len(self._events) >= self.rpm:
+            return False
+        if self.tpm is not None and self._events:
+            used = sum(t for _, t in self._events)
+            return used + tokens <= self.tpm
+        return True
+
+    async def acquire(self, tokens=1):
+        """Waits until the request fits in the window, then records it."""
+        # Limiters are shared process-wide; asyncio locks are bound to one loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock = loop, asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._purge(now)
+                if self._has_room(tokens):
+                    self._events.append((now, tokens))
+                    return
+                await asyncio.sleep(self.window - (now - self._events[0][0]) + 0.05)
+
+
+def is_rate_limit_error(error):
+    """True for quota errors from either google-api-core or the google-genai SDK."""
+    if isinstance(error, ResourceExhausted):
+        return True
+    return getattr(error, "code", None) == 429 or getattr(error, "status", None) == "RESOURCE_EXHAUSTED"
+
+
+def is_transient_error(error):
+    """Quota errors plus 5xx/unavailable responses: worth retrying the same request."""
+    if is_rate_limit_error(error) or isinstance(error, (ServiceUnavailable, InternalServerError)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+async def retry_on_rate_limit(call, max_attempts=5, base_delay=2.0, max_delay=60.0, should_retry=is_rate_limit_error):
+    """
+    Awaits `call()` and retries 429s (or whatever `should_retry` accepts) with
+    exponential backoff and full jitter. Any other error is raised immediately.
+    """
+    for attempt in range(max_attempts):
+        try:
+            return await call()
+        except Exception as e:
+            if not should_retry(e) or attempt == max_attempts - 1:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            reason = "Rate limited" if is_rate_limit_error(e) else f"Transient error ({e})"
+            print(f"{reason} (attempt {attempt + 1}/{max_attempts}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
@@ -0,0 +1,97 @@
+"""
+Deterministic checks for the mechanical parts of the script standards, run
+before the LLM evaluator so formatting problems never cost a model call.
+"""
+import re
+
+MAX_SENTENCE_CHARS = 80
+
+# Closing lines the script prompt mandates word for word; they are not the
+# writer's to shorten, so the length rule skips them
+MANDATED_SENTENCES = {
+    "this spoken tutorial is brought to you by edupyramids educational services private limited, sine, iit bombay.",
+    "thank you for joining!",
+}
+
+CLICHES = [
+    "exciting journey", "let's dive in", "embark on", "delve into",
+    "master the art of", "unlock", "game-changer",
+]
+
+# Arrows, dashes used as punctuation, and symbols a narrator cannot read out
+SYMBOL_PATTERNS = [
+    (re.compile(r"->|=>|<-|→|←|⇒"), "arrow"),
+    (re.compile(r"(?:^|\s)[-–—](?:\s|$)|--|—|–"), "dash"),
+    (re.compile(r"[*#_|<>{}\[\]\\^~`=]"), "symbol"),
+]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_CLICHE_PATTERNS = [(c, re.compile(rf"\b{re.escape(c)}\b", re.IGNORECASE)) for c in CLICHES]
+
+
+def split_sentences(line):
+    """Splits a narration line on sentence ends and explicit newlines."""
+    sentences = []
+    for part in line.splitlines():
+        sentences.extend(s.strip() for s in _SENTENCE_END.split(part) if s.strip())
+    return sentences
+
+
+def _is_mandated(sentence):
+    return " ".join(sentence.lower().split()) in MANDATED_SENTENCES
+
+
+def _violation(slide, rule, message):
+    return {"slide": slide, "rule": rule, "message": message}
+
+
+def lint_slide(number, slide):
+    """Returns the violations for one slide; `number` is 1-based, as in feedback."""
+    violations = []
+    content = slide.get('content') or []
+    narration = slide.get('narration') or []
+    if isinstance(narration, str):
+        narration = [narration]
+
+    if len(narration) != len(content) + 1:
+        violations.append(_violation(
+            number, "narration_count",
+            f"has {len(narration)} narration lines but needs {len(content) + 1} "
+            f"(one for the title plus one per bullet)"
+        ))
+
+    for line in narration:
+        if not isinstance(line, str):
+            continue
+        for sentence in split_sentences(line):
+            if len(sentence) > MAX_SENTENCE_CHARS and not _is_mandated(sentence):
+                violations.append(_violation(
+                    number, "sentence_length",
+                    f"narration sentence has {len(sentence)} characters (max {MAX_SENTENCE_CHARS}): \"{sentence}\""
+                ))
+        for pattern, kind in SYMBOL_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                violations.append(_violation(
+                    number, "symbol",
+                    f"narration contains an unspeakable {kind} '{match.group().strip()}': \"{line.strip()}\""
+                ))
+                break  # one symbol report per line is enough to get it rewritten
+        plain = line.replace("\u2019", "'")  # curly apostrophes from the model
+        for cliche, pattern in _CLICHE_PATTERNS:
+            if pattern.search(plain):
+                violations.append(_violation(number, "cliche", f"narration uses the cliché \"{cliche}\""))
+    return violations
+
+
+def lint_script(json_script):
+    """Runs every mechanical check over the script. Returns a list of violation dicts."""
+    violations = []
+    for number, slide in enumerate(json_script.get('slides', []), start=1):
+        violations.extend(lint_slide(number, slide))
+    return violations
+
+
+def format_violations(violations):
+    """Feedback text for the optimiser, one violation per line."""
+    return "\n".join(f"Slide {v['slide']}: {v['message']}" for v in violations)
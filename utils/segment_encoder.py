@@ -0,0 +1,123 @@
+"""
+Segmented rendering: each slide is encoded on its own into an MP4 segment
+as soon as its narration and pages exist, and the segments are joined with
+a stream copy at the end.
+"""
+import hashlib
+import os
+import threading
+import fitz
+from utils.asset_cache import get_cache, make_key
+from utils.audio_utils import wav_duration
+from utils.narration_timing import page_durations
+from utils.ffmpeg_utils import VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_FPS, write_concat_list, encode_stills, fit_page
+from utils.rasterise import rasterise_pages, page_image_path
+from utils.stage_limits import stage_slot
+
+# "single" encodes the whole video in one ffmpeg pass, "segments" encodes per slide
+VIDEO_RENDER_MODE = os.getenv("VIDEO_RENDER_MODE", "single")
+SEGMENT_WORKERS = int(os.getenv("SEGMENT_WORKERS", "2"))
+
+# Bump when encode settings change so cached segments are not mixed with new ones
+SEGMENT_FORMAT = 1
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def slide_page_ranges(slides, num_pages):
+    """
+    Maps slide index -> its page indices in the slides PDF: a title page
+    plus one page per content item, clipped to the pages that exist.
+    """
+    ranges = {}
+    first_page = 0
+    for i, slide in enumerate(slides):
+        count = len(slide.get('content', [])) + 1
+        ranges[i] = [p for p in range(first_page, first_page + count) if p < num_pages]
+        first_page += count
+    return ranges
+
+
+class SegmentRenderer:
+    """
+    Encodes the slides of one slides PDF into segments, cached by the hash of
+    their page images, narration and background video. Re-rendering after a
+    single-slide edit therefore only re-encodes that slide. Page images are
+    rasterised once per PDF into the workspace, so the audio stage and
+    create_video share them.
+    """
+
+    def __init__(self, pdf_path, slides, work_dir):
+        self.pdf_path = pdf_path
+        self.slides = slides
+        with fitz.open(pdf_path) as doc:
+            num_pages = len(doc)
+            page = doc.load_page(0)
+            self.page_box = fit_page(page.rect.width, page.rect.height)
+        self.ranges = slide_page_ranges(slides, num_pages)
+        self.page_dir = os.path.join(work_dir, "pages", file_digest(pdf_path)[:16])
+        os.makedirs(self.page_dir, exist_ok=True)
+        self.cache = get_cache("segments", default_max_mb=2048)
+        # PyMuPDF is not thread-safe, and ffmpeg runs are capped per renderer
+        self._raster_lock = threading.Lock()
+        self._encoders = threading.BoundedSemaphore(SEGMENT_WORKERS)
+
+    def page_images(self, i):
+        pages = self.ranges.get(i, [])
+        with self._raster_lock:
+            missing = [p for p in pages if not os.path.exists(page_image_path(self.page_dir, p))]
+            if missing:
+                rasterise_pages(self.pdf_path, missing, self.page_dir, workers=1)
+        return [page_image_path(self.page_dir, p) for p in pages]
+
+    def encode(self, i, audio_path):
+        """Returns the segment for slide `i` narrated by `audio_path`, encoding it on a cache miss."""
+        images = self.page_images(i)
+        if not images:
+            return None
+        slide = self.slides[i]
+        duration = wav_duration(audio_path)
+        durations = page_durations(audio_path, slide.get('narration', []), len(images), duration)
+        entries = list(zip(images, durations))
+
+        overlay = slide.get('image_path') if slide.get('is_video_slide') else None
+        if not (overlay and overlay.endswith('.mp4') and os.path.exists(overlay)):
+            overlay = None
+
+        key = make_key(
+            [file_digest(image) for image in images], [round(d, 3) for _, d in entries],
+            file_digest(audio_path), overlay and file_digest(overlay), self.page_box,
+            VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_FPS, SEGMENT_FORMAT,
+        )
+        cached = self.cache.get(key, ".mp4")
+        if cached:
+            print(f"✓ Reused encoded segment for slide {i}")
+            return cached
+
+        list_path = write_concat_list(entries, os.path.join(self.page_dir, f"slide_{i:03d}.txt"))
+        overlays = [(overlay, 0.0, duration)] if overlay else ()
+        # Segments are also encoded from the audio stage, outside create_video,
+        # so each encode takes its own slot under FFMPEG_STAGE_CONCURRENCY
+        with self._encoders, stage_slot("ffmpeg"):
+            path = self.cache.store(key, ".mp4", lambda tmp_path: encode_stills(
+                list_path, audio_path, tmp_path, duration, overlays=overlays, page_box=self.page_box, segment=True))
+        print(f"✓ Encoded segment for slide {i} ({duration:.2f}s)")
+        return path
+
+
+def segment_renderer(state):
+    """
+    The renderer for this run in "segments" mode once the slides PDF exists,
+    otherwise None.
+    """
+    pdf_path = state.get('pdf_path')
+    json_script = state.get('json_script')
+    if VIDEO_RENDER_MODE != "segments" or not json_script or not pdf_path or not os.path.exists(pdf_path):
+        return None
+    return SegmentRenderer(pdf_path, json_script['slides'], state.get('workspace_dir') or os.getcwd())
@@ -0,0 +1,54 @@
+"""
+Process-wide concurrency limits per pipeline stage, so concurrent jobs
+cannot oversubscribe LLM quota, LaTeX or ffmpeg CPU at the same time.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import threading
+
+STAGE_LIMITS = {
+    "llm": int(os.getenv("LLM_STAGE_CONCURRENCY", "4")),
+    "latex": int(os.getenv("LATEX_STAGE_CONCURRENCY", "2")),
+    "ffmpeg": int(os.getenv("FFMPEG_STAGE_CONCURRENCY", "1")),
+}
+
+_semaphores = {stage: threading.BoundedSemaphore(limit) for stage, limit in STAGE_LIMITS.items()}
+
+
+def stage_slot(stage):
+    """
+    The process-wide semaphore for `stage`, for holding a slot around just
+    part of a node or helper: `with stage_slot("ffmpeg"): ...`.
+    """
+    return _semaphores[stage]
+
+
+def limit_stage(stage):
+    """
+    Decorator that runs a node only while holding a slot for `stage`.
+    Works for both sync nodes (run in LangGraph's thread pool) and async nodes.
+    """
+    semaphore = _semaphores[stage]
+
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                # Poll rather than block a thread, so a cancelled job never holds a slot
+                while not semaphore.acquire(blocking=False):
+                    await asyncio.sleep(0.05)
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    semaphore.release()
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with semaphore:
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
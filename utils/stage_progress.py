@@ -0,0 +1,65 @@
+"""
+Per-slide progress for the media stages, kept in the run's workspace so a
+retried or resumed node only regenerates the slides that are missing.
+"""
+import json
+import os
+import threading
+
+
+class StageProgress:
+    """
+    Maps slide index -> {"key", "path", "bytes"} for one stage. `key` is the
+    hash of the slide's inputs (prompt, voice, model...), so an entry only
+    counts once the inputs are unchanged and the file is still intact.
+    Without a `path` the record lives only in memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, slide, key):
+        """Returns the recorded asset for `slide` if it was made from `key`, else None."""
+        entry = self._entries.get(str(slide))
+        if not entry or entry.get("key") != key:
+            return None
+        try:
+            if os.path.getsize(entry["path"]) != entry.get("bytes"):
+                return None
+        except OSError:
+            return None
+        return entry["path"]
+
+    def record(self, slide, key, path):
+        with self._lock:
+            self._entries[str(slide)] = {"key": key, "path": path, "bytes": os.path.getsize(path)}
+            if not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def done(self):
+        return len(self._entries)
+
+
+def stage_progress(state, stage):
+    """The progress record for `stage` ("images", "audio", ...) of this run."""
+    workspace = state.get('workspace_dir')
+    if not workspace:
+        return StageProgress()
+    directory = os.path.join(workspace, "progress")
+    os.makedirs(directory, exist_ok=True)
+    return StageProgress(os.path.join(directory, f"{stage}.json"))
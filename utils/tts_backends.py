@@ -0,0 +1,201 @@
+"""
+Text-to-speech backends for the narration. Gemini is the default; edge-tts
+and gTTS take over when it is rate-limited, and the stub speaks in tones so
+the pipeline runs without network access.
+"""
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import io
+import os
+import numpy as np
+from utils.audio_utils import samples_to_pcm
+from utils.ffmpeg_utils import decode_to_pcm
+from utils.genai_client import get_client
+from utils.rate_limit import is_transient_error
+from utils.script_lint import split_sentences
+from utils.tts_scheduler import get_tts_scheduler
+
+TTS_MODEL = 'gemini-2.5-flash-preview-tts'
+PCM_RATE = 24000
+
+DEFAULT_TTS_BACKEND = os.getenv("TTS_BACKEND", "gemini")
+TTS_FALLBACKS = [name for name in os.getenv("TTS_FALLBACKS", "edge,gtts").split(",") if name]
+# Per-audience overrides, e.g. "kids:edge,professionals:gemini"
+AUDIENCE_BACKENDS = dict(
+    item.split(":", 1) for item in os.getenv("TTS_AUDIENCE_BACKENDS", "").split(",") if ":" in item
+)
+# Attempts on a backend that has a fallback after it, so a 429 fails over quickly
+FAILOVER_ATTEMPTS = int(os.getenv("TTS_FAILOVER_ATTEMPTS", "2"))
+
+
+class TTSBackend(ABC):
+    """
+    A speech provider. `synthesize` returns (pcm, rate) with mono 16-bit PCM,
+    or None. `cache_id` identifies everything besides the text that changes
+    the audio, for the audio cache key.
+    """
+    name = None
+
+    def cache_id(self, audience):
+        return (self.name,)
+
+    @abstractmethod
+    async def synthesize(self, text, audience, max_attempts=5):
+        ...
+
+
+class GeminiTTS(TTSBackend):
+    name = "gemini"
+
+    # Audience-specific voice prompts
+    PROMPTS = {
+        'kids': "Read aloud in a fun, energetic, and playful tone, like a storyteller for children.",
+        'students': "Read aloud in a clear, educational, and engaging tone, like a friendly teacher.",
+        'professionals': "Read aloud in a professional, confident, and concise tone, suitable for a business presentation.",
+        'general': "Read aloud in a warm, welcoming, and conversational tone."
+    }
+
+    # Audience-specific voices
+    VOICES = {
+        'kids': "Tevel",
+        'students': "Kore",
+        'professionals': "Ophir",
+        'general': "Kore"
+    }
+
+    def voice(self, audience):
+        return self.VOICES.get(audience, "Kore"), self.PROMPTS.get(audience, self.PROMPTS['general'])
+
+    def cache_id(self, audience):
+        # Same parts as before backends existed, so previously cached clips stay valid
+        return (*self.voice(audience), TTS_MODEL)
+
+    async def synthesize(self, text, audience, max_attempts=5):
+        voice, instruction = self.voice(audience)
+        scheduler = get_tts_scheduler(TTS_MODEL)
+        pcm = await scheduler.synthesize(get_client(), f"{instruction} {text}", voice, max_attempts=max_attempts)
+        return (pcm, PCM_RATE) if pcm else None
+
+
+class EdgeTTS(TTSBackend):
+    name = "edge"
+
+    VOICES = {
+        'kids': "en-US-AnaNeural",
+        'students': "en-US-AriaNeural",
+        'professionals': "en-US-GuyNeural",
+        'general': "en-US-JennyNeural"
+    }
+
+    def cache_id(self, audience):
+        return (self.name, self.VOICES.get(audience, self.VOICES['general']))
+
+    async def synthesize(self, text, audience, max_attempts=5):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, self.VOICES.get(audience, self.VOICES['general']))
+        mp3 = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                mp3.extend(chunk["data"])
+        if not mp3:
+            return None
+        return await asyncio.to_thread(decode_to_pcm, bytes(mp3), PCM_RATE), PCM_RATE
+
+
+class GTTSBackend(TTSBackend):
+    name = "gtts"
+
+    def cache_id(self, audience):
+        return (self.name, "en")
+
+    async def synthesize(self, text, audience, max_attempts=5):
+        from gtts import gTTS
+
+        def run():
+            buffer = io.BytesIO()
+            gTTS(text, lang="en").write_to_fp(buffer)
+            return decode_to_pcm(buffer.getvalue(), PCM_RATE)
+
+        pcm = await asyncio.to_thread(run)
+        return (pcm, PCM_RATE) if pcm else None
+
+
+class StubTTS(TTSBackend):
+    """
+    Offline and deterministic: each sentence becomes a tone lasting about as
+    long as reading it aloud, followed by a pause, so page timing and video
+    length behave like real narration.
+    """
+    name = "stub"
+    CHARS_PER_SECOND = 15.0
+    PAUSE_SECONDS = 0.3
+
+    async def synthesize(self, text, audience, max_attempts=5):
+        parts = []
+        for sentence in split_sentences(text) or [text]:
+            seed = int(hashlib.sha256(sentence.encode("utf-8")).hexdigest()[:8], 16)
+            seconds = max(0.4, len(sentence) / self.CHARS_PER_SECOND)
+            t = np.arange(int(seconds * PCM_RATE)) / PCM_RATE
+            envelope = np.minimum(1.0, np.minimum(t, seconds - t) / 0.05)
+            parts.append(0.3 * envelope * np.sin(2 * np.pi * (180 + seed % 120) * t))
+            parts.append(np.zeros(int(self.PAUSE_SECONDS * PCM_RATE)))
+        return samples_to_pcm(np.concatenate(parts).astype(np.float32)), PCM_RATE
+
+
+TTS_BACKENDS = {backend.name: backend for backend in (GeminiTTS, EdgeTTS, GTTSBackend, StubTTS)}
+
+_instances = {}
+
+
+def get_tts_backend(name):
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}' (choose from {', '.join(TTS_BACKENDS)})")
+    if name not in _instances:
+        _instances[name] = TTS_BACKENDS[name]()
+    return _instances[name]
+
+
+def _should_fail_over(error):
+    # Quota and server errors, an optional package that is not installed, or a network failure
+    return is_transient_error(error) or isinstance(error, (ImportError, OSError, asyncio.TimeoutError))
+
+
+class TTSChain:
+    """A primary backend followed by the fallbacks tried when it is rate-limited or unavailable."""
+
+    def __init__(self, backends):
+        self.backends = backends
+
+    @property
+    def primary(self):
+        return self.backends[0]
+
+    async def synthesize(self, text, audience):
+        """Returns (backend, pcm, rate) from the first backend that produced audio, or None."""
+        for k, backend in enumerate(self.backends):
+            last = k == len(self.backends) - 1
+            try:
+                result = await backend.synthesize(text, audience, max_attempts=5 if last else FAILOVER_ATTEMPTS)
+            except Exception as e:
+                if last or not _should_fail_over(e):
+                    raise
+                print(f"⚠ {backend.name} TTS failed ({e}), falling back to {self.backends[k + 1].name}")
+                continue
+            if result:
+                return (backend, *result)
+        return None
+
+
+def tts_chain(state):
+    """
+    The backends for this run: the request's `tts_backend`, else the
+    audience's configured backend, else TTS_BACKEND, followed by the
+    fallbacks. The stub never falls back, and is never a fallback itself.
+    """
+    audience = state.get('target_audience') or 'general'
+    name = state.get('tts_backend') or AUDIENCE_BACKENDS.get(audience) or DEFAULT_TTS_BACKEND
+    names = [name]
+    if name != "stub":
+        names += [fallback for fallback in TTS_FALLBACKS if fallback not in (name, "stub")]
+    return TTSChain([get_tts_backend(n) for n in names])
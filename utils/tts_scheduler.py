@@ -0,0 +1,84 @@
+"""
+Shared, quota-aware scheduler for text-to-speech requests.
+"""
+import asyncio
+import os
+from google.genai import types
+from utils.rate_limit import SlidingWindowLimiter, retry_on_rate_limit, is_transient_error
+from utils.genai_client import model_limit
+
+# Published free-tier quotas; override with TTS_RPM / TTS_TPM.
+MODEL_QUOTAS = {
+    'gemini-2.5-flash-preview-tts': {'rpm': 10, 'tpm': 10000},
+    'gemini-2.5-pro-preview-tts': {'rpm': 10, 'tpm': 10000},
+}
+
+_schedulers = {}
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used for TPM accounting."""
+    return max(1, len(text) // 4)
+
+
+class TTSScheduler:
+    """
+    Issues TTS requests for one model concurrently, up to the model's RPM/TPM
+    budget, retrying 429s and 5xx errors per request with jittered backoff.
+    """
+
+    def __init__(self, model, rpm, tpm=None, max_concurrency=None):
+        self.model = model
+        self.limiter = SlidingWindowLimiter(rpm=rpm, tpm=tpm)
+        self.max_concurrency = max_concurrency or rpm
+        self._semaphore = None
+        self._loop = None
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def synthesize(self, client, text, voice_name, max_attempts=5):
+        """
+        Returns the raw PCM bytes for `text` spoken with `voice_name`, or None.
+        Callers with a fallback backend pass fewer `max_attempts` to fail over sooner.
+        """
+        async def attempt():
+            await self.limiter.acquire(estimate_tokens(text))
+            async with model_limit(self.model):
+                return await client.aio.models.generate_content(
+                    model=self.model,
+                    contents=text,
+                    config=types.GenerateContentConfig(
+                        response_modalities=["AUDIO"],
+                        speech_config=types.SpeechConfig(
+                            voice_config=types.VoiceConfig(
+                                prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                    voice_name=voice_name
+                                )
+                            )
+                        )
+                    )
+                )
+
+        async with self._get_semaphore():
+            response = await retry_on_rate_limit(attempt, max_attempts=max_attempts, should_retry=is_transient_error)
+
+        for part in response.parts or []:
+            if part.inline_data:
+                return part.inline_data.data
+        return None
+
+
+def get_tts_scheduler(model):
+    """Returns the process-wide scheduler for `model`, creating it on first use."""
+    if model not in _schedulers:
+        quota = MODEL_QUOTAS.get(model, {'rpm': 10, 'tpm': None})
+        rpm = int(os.getenv("TTS_RPM", quota['rpm']))
+        tpm = os.getenv("TTS_TPM", quota['tpm'])
+        max_concurrency = int(os.getenv("TTS_MAX_CONCURRENCY", rpm))
+        _schedulers[model] = TTSScheduler(model, rpm=rpm, tpm=int(tpm) if tpm else None,
+                                          max_concurrency=max_concurrency)
+    return _schedulers[model]
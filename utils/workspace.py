@@ -0,0 +1,85 @@
+"""
+Per-job working directories, so concurrent graph runs never share file names.
+"""
+import os
+import shutil
+import time
+import uuid
+
+WORKSPACE_ROOT = os.path.abspath(os.getenv("WORKSPACE_ROOT", "workspaces"))
+
+# "keep": leave everything, "intermediates": keep only the final artifacts,
+# "all": delete the workspace once the artifacts have been served elsewhere.
+CLEANUP_POLICY = os.getenv("WORKSPACE_CLEANUP", "intermediates")
+
+
+def new_job_id(project_id=None):
+    suffix = uuid.uuid4().hex[:12]
+    return f"{project_id}_{suffix}" if project_id else suffix
+
+
+def create_workspace(job_id=None):
+    """Creates the workspace for `job_id` (a new id if omitted). Returns (job_id, path)."""
+    job_id = job_id or new_job_id()
+    path = os.path.join(WORKSPACE_ROOT, job_id)
+    os.makedirs(path, exist_ok=True)
+    return job_id, path
+
+
+def workspace_dir(state):
+    """The run's workspace; runs started without one keep the old CWD behaviour."""
+    path = state.get('workspace_dir') or os.getcwd()
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def workspace_path(state, *parts):
+    """Absolute path of an artifact inside the run's workspace."""
+    path = os.path.join(workspace_dir(state), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return os.path.abspath(path)
+
+
+def artifact_url(path):
+    """URL under the /workspaces mount for a file inside WORKSPACE_ROOT, or None."""
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    if not path.startswith(WORKSPACE_ROOT + os.sep):
+        return None
+    return "/workspaces/" + os.path.relpath(path, WORKSPACE_ROOT).replace(os.sep, "/")
+
+
+def cleanup_workspace(path, keep=(), policy=None):
+    """Applies the cleanup policy to a finished run's workspace."""
+    policy = policy or CLEANUP_POLICY
+    if policy == "keep" or not path or not os.path.isdir(path):
+        return
+    if policy == "all":
+        shutil.rmtree(path, ignore_errors=True)
+        return
+
+    keep = {os.path.abspath(p) for p in keep if p}
+    for name in os.listdir(path):
+        entry = os.path.abspath(os.path.join(path, name))
+        if entry in keep:
+            continue
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            os.remove(entry)
+
+
+def prune_workspaces(max_age_hours=None):
+    """Removes workspaces that have not been modified for `max_age_hours`."""
+    max_age_hours = float(max_age_hours or os.getenv("WORKSPACE_TTL_HOURS", "72"))
+    if not os.path.isdir(WORKSPACE_ROOT):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for name in os.listdir(WORKSPACE_ROOT):
+        path = os.path.join(WORKSPACE_ROOT, name)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed